@@ -0,0 +1,64 @@
+import json
+import os
+import re
+from util import copy_if_changed, write_if_changed
+
+MANIFEST_NAME = "asset-manifest.json"
+
+# matches href="...", src="..." and srcset="..." attributes in rendered html
+ASSET_URL_RE = re.compile(r'\b(href|src|srcset)="([^"]*)"')
+
+#Function to build the fingerprinted name for an asset, e.g. index.css -> index.3f2a1c9d.css
+# -- input: rel_path (string, "/" separated), digest (hex string)
+# -- output: fingerprinted relative path (string)
+def fingerprint_name(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:8]}{ext}"
+
+#Function to emit a fingerprinted copy of every copied static file and write the manifest.
+#The original names are kept as well so hand-written urls keep working.
+# -- input: destination (Path, the output directory), hashes (dict of relative path -> digest from copy_files)
+# -- output: manifest dict of "/original/url" -> "/fingerprinted/url"
+def fingerprint_assets(destination, hashes):
+    manifest = {}
+    for rel_path, digest in sorted(hashes.items()):
+        fingerprinted = fingerprint_name(rel_path, digest)
+        copy_if_changed(os.path.join(destination, rel_path), os.path.join(destination, fingerprinted))
+        manifest["/" + rel_path] = "/" + fingerprinted
+
+    data = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    write_if_changed(os.path.join(destination, MANIFEST_NAME), data.encode("utf-8"))
+    print(f"Fingerprinted {len(manifest)} assets into {os.path.join(destination, MANIFEST_NAME)}")
+    return manifest
+
+#Function to look up the fingerprinted url of a single url. Any ?query or #fragment is kept.
+# -- input: url (string), manifest (dict from fingerprint_assets)
+# -- output: url (string), unchanged if it is not in the manifest
+def fingerprint_url(url, manifest):
+    split_at = len(url)
+    for char in "?#":
+        index = url.find(char)
+        if index != -1:
+            split_at = min(split_at, index)
+    path = url[:split_at]
+    if path not in manifest:
+        return url
+    return manifest[path] + url[split_at:]
+
+#Function to point href/src attributes, and every candidate of srcset attributes, at fingerprinted assets
+# -- input: html (string), manifest (dict from fingerprint_assets)
+# -- output: html (string)
+def rewrite_asset_urls(html, manifest):
+    if not manifest:
+        return html
+
+    def replace(match):
+        if match.group(1) == "srcset":
+            candidates = []
+            for candidate in match.group(2).split(", "):
+                url, sep, descriptor = candidate.partition(" ")
+                candidates.append(fingerprint_url(url, manifest) + sep + descriptor)
+            return 'srcset="' + ", ".join(candidates) + '"'
+        return f'{match.group(1)}="{fingerprint_url(match.group(2), manifest)}"'
+
+    return ASSET_URL_RE.sub(replace, html)
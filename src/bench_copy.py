@@ -0,0 +1,60 @@
+# Benchmark for copy_files: compares the thread-pooled copy engine against the original
+# recursive, one-file-at-a-time implementation on a synthetic static/ tree.
+# usage: python3 src/bench_copy.py [file_count] [file_size_bytes]
+import os
+import shutil
+import sys
+import tempfile
+import time
+from util import copy_files
+
+
+#The copy implementation copy_files replaced, without its per-file printing.
+def legacy_copy_files(source, destination):
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    os.mkdir(destination)
+    for item in os.listdir(source):
+        src_item = os.path.join(source, item)
+        dst_item = os.path.join(destination, item)
+        if os.path.isfile(src_item):
+            shutil.copy(src_item, dst_item)
+        else:
+            legacy_copy_files(src_item, dst_item)
+
+
+def make_tree(root, file_count, file_size):
+    for i in range(file_count):
+        folder = os.path.join(root, "images", f"set{i % 50}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"image{i}.png"), "wb") as f:
+            f.write(os.urandom(file_size))
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.3f}s")
+    return elapsed
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    file_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64 * 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "static")
+        make_tree(source, file_count, file_size)
+        print(f"{file_count} files of {file_size} bytes")
+
+        timed("legacy sequential copy", lambda: legacy_copy_files(source, os.path.join(tmp, "legacy")))
+        for workers in (1, 4, 16):
+            dest = os.path.join(tmp, f"pool{workers}")
+            timed(f"copy_files workers={workers}", lambda: copy_files(source, dest, workers=workers))
+        timed("copy_files workers=16, hashed", lambda: copy_files(source, os.path.join(tmp, "hashed"), workers=16, hash_files=True))
+        timed("copy_files rerun, unchanged", lambda: copy_files(source, os.path.join(tmp, "pool16"), workers=16))
+
+
+if __name__ == "__main__":
+    main()
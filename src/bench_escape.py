@@ -0,0 +1,57 @@
+# Microbenchmark for escaping in LeafNode serialization: renders a typical page's worth of leaf
+# nodes with the escaping to_html and with the previous unescaped serialization, and fails if the
+# escaping overhead is over BUDGET.
+# usage: python3 src/bench_escape.py [repeats]
+import sys
+import timeit
+from htmlnode import LeafNode
+
+# allowed slowdown of escaped over unescaped serialization on typical text
+BUDGET = 0.15
+
+
+#LeafNode with the serialization it had before escaping was added.
+class UnescapedLeafNode(LeafNode):
+    def props_to_html(self):
+        if self.props is None:
+            return ""
+        return "".join(f' {key}="{value}"' for key, value in self.props.items())
+
+    def to_html(self):
+        if self.value is None:
+            raise ValueError("LeafNode value is empty")
+        if self.tag is None:
+            return self.value
+        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+
+def make_nodes(node_class):
+    nodes = []
+    for i in range(200):
+        nodes.append(node_class(None, f"In the annals of fantasy literature, paragraph {i} weaves its tale of heroes and deeds "))
+        nodes.append(node_class("b", "Archmage"))
+        nodes.append(node_class("a", "wiki here", {"href": f"https://lotr.fandom.com/wiki/Page_{i}"}))
+        nodes.append(node_class("img", "", {"src": f"/images/{i}.png", "alt": "Tolkien sitting"}))
+        # a few fragments really do need escaping
+        if i % 20 == 0:
+            nodes.append(node_class(None, "< Back Home & more"))
+    return nodes
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    unescaped = make_nodes(UnescapedLeafNode)
+    nodes = make_nodes(LeafNode)
+    before = min(timeit.repeat(lambda: [node.to_html() for node in unescaped], number=repeats, repeat=5))
+    after = min(timeit.repeat(lambda: [node.to_html() for node in nodes], number=repeats, repeat=5))
+    overhead = after / before - 1
+    print(f"{len(nodes)} leaf nodes x {repeats}")
+    print(f"{'unescaped':<12} {before:8.4f}s")
+    print(f"{'escaped':<12} {after:8.4f}s")
+    print(f"overhead {overhead:+.1%} (budget {BUDGET:.0%})")
+    if overhead > BUDGET:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Benchmark for fenced-code highlighting on code-heavy pages: renders the same set of pages with no
+# highlighting, with the registered highlighters called directly (every block highlighted), with a
+# fresh cache per page (snippets repeated within a page are hits), and with one cache shared by the
+# whole build, as main.py does.
+# usage: python3 src/bench_highlight.py [page_count] [blocks_per_page]
+import random
+import sys
+import time
+from highlight import CachedHighlighter, DEFAULT_LANGUAGE, HIGHLIGHTERS, pygments
+from markdown_blocks import markdown_to_html_node
+from rendercontext import RenderContext
+
+SNIPPETS = [
+    'def greet(name):\n    return f"Hello, {name}"\n',
+    "for i in range(10):\n    print(i * i)\n",
+    "class Node:\n    def __init__(self, value):\n        self.value = value\n        self.children = []\n",
+    'import os\nprint(os.listdir("."))\n',
+]
+
+
+def make_page(blocks, rng):
+    parts = ["# Code heavy page"]
+    for i in range(blocks):
+        parts.append(f"Paragraph {i} with **bold** and `inline code`.")
+        # most documentation repeats a handful of snippets; a few blocks are unique
+        snippet = rng.choice(SNIPPETS) if rng.random() < 0.8 else f"value_{i} = {i}\nprint(value_{i})\n"
+        parts.append("```python\n" + snippet + "```")
+    return "\n\n".join(parts)
+
+
+#The lookup CachedHighlighter does, without the cache: every block is highlighted.
+def uncached_highlighter(code, language):
+    language = language.lower()
+    highlighter = HIGHLIGHTERS.get(language) or HIGHLIGHTERS.get(DEFAULT_LANGUAGE)
+    if not language or highlighter is None:
+        return None
+    return highlighter(code, language)
+
+
+def render_all(pages, make_context):
+    start = time.perf_counter()
+    for page in pages:
+        markdown_to_html_node(page, make_context()).to_html()
+    return time.perf_counter() - start
+
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    rng = random.Random(0)
+    pages = [make_page(blocks, rng) for _ in range(page_count)]
+    if pygments is None:
+        print("Pygments is not installed: benchmarking the hook with no highlighters registered")
+    print(f"{page_count} pages x {blocks} code blocks, highlighters: {sorted(HIGHLIGHTERS)}")
+
+    plain = render_all(pages, lambda: RenderContext())
+    print(f"{'no highlighting':<32} {plain:8.3f}s")
+    uncached = render_all(pages, lambda: RenderContext(highlighter=uncached_highlighter))
+    print(f"{'highlighting, no cache':<32} {uncached:8.3f}s")
+    per_page = []
+
+    def per_page_context():
+        per_page.append(CachedHighlighter())
+        return RenderContext(highlighter=per_page[-1])
+    per_page_time = render_all(pages, per_page_context)
+    hits = sum(highlighter.hits for highlighter in per_page)
+    misses = sum(highlighter.misses for highlighter in per_page)
+    print(f"{'highlighting, cache per page':<32} {per_page_time:8.3f}s  ({hits} hits, {misses} misses)")
+    shared = CachedHighlighter()
+    cached = render_all(pages, lambda: RenderContext(highlighter=shared))
+    print(f"{'highlighting, shared cache':<32} {cached:8.3f}s  ({shared.hits} hits, {shared.misses} misses)")
+
+
+if __name__ == "__main__":
+    main()
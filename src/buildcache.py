@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+from util import write_if_changed
+
+# build state lives in the gitignored .cache directory, next to the image cache, never in the published docs/
+DEFAULT_CACHE_PATH = ".cache/build-cache.json"
+
+#Function to hash the generator's own source, so a change to the rendering code invalidates the cache
+# -- output: hex digest (string)
+def code_digest():
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py") and not name.startswith("test_"):
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + f.read())
+    return digest.hexdigest()
+
+#Records, for every generated page, the digest of its markdown source and of the layout it was
+#rendered with. A page whose source and layout are unchanged since the last build does not need
+#to be rendered again. Anything else that affects every page (basepath, asset manifest, image
+#props) goes into settings, together with a digest of the generator code; when either changes the
+#whole cache is discarded.
+class BuildCache():
+    def __init__(self, path, settings):
+        self.path = path
+        data = json.dumps({"settings": settings, "code": code_digest()}, sort_keys=True)
+        self.settings = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        self.entries = {}
+        self.seen = set()
+
+    #Function to load the cache written by the previous build
+    # -- input: path (Path), settings (json-serializable value)
+    # -- output: BuildCache (empty if missing or built with different settings)
+    @classmethod
+    def load(cls, path, settings):
+        cache = cls(path, settings)
+        if os.path.isfile(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("settings") == cache.settings:
+                cache.entries = data.get("pages", {})
+        return cache
+
+    #Function to check whether dest_path is up to date with its source and layout
+    # -- input: dest_path (Path), source_digest (hex string), layout_digest (hex string)
+    # -- output: bool
+    def is_fresh(self, dest_path, source_digest, layout_digest):
+        key = dest_path.replace(os.sep, "/")
+        fresh = self.entries.get(key) == [source_digest, layout_digest] and os.path.isfile(dest_path)
+        if fresh:
+            self.seen.add(key)
+        return fresh
+
+    #Function to record that dest_path was rendered from a source and layout
+    def update(self, dest_path, source_digest, layout_digest):
+        key = dest_path.replace(os.sep, "/")
+        self.entries[key] = [source_digest, layout_digest]
+        self.seen.add(key)
+
+    #Function to write the cache, dropping pages that were not generated in this build
+    # -- output: True if the file was written
+    def save(self):
+        pages = {key: value for key, value in self.entries.items() if key in self.seen}
+        data = json.dumps({"settings": self.settings, "pages": pages}, indent=1, sort_keys=True)
+        return write_if_changed(self.path, data.encode("utf-8"))
+
+    def __repr__(self):
+        return f"BuildCache({self.path}, pages: {len(self.entries)})"
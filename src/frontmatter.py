@@ -0,0 +1,117 @@
+import itertools
+import re
+from markdown_blocks import find_title
+
+#Front matter is an optional block of YAML-style "key: value" lines at the very top of a markdown
+#file, fenced by "---" lines:
+#
+#   ---
+#   date: 2024-05-01
+#   title: "Glorfindel: a reappraisal"
+#   draft: false
+#   tags: [tolkien, elves]
+#   authors:
+#     - Andrew
+#   ---
+#   # Title
+#
+#Supported values are plain or quoted strings, integers, true/false, inline [a, b] lists and
+#block lists of "- item" lines. Nested mappings are not supported.
+
+FENCE = "---"
+# keys that are always lists; a plain "tags: a, b" is split on commas
+LIST_KEYS = ("tags",)
+# keys whose values (or list items) stay strings: listings and feeds sort, join and format them as text
+TEXT_KEYS = ("date", "tags")
+INT_RE = re.compile(r"-?\d+")
+
+#Function to turn a single front-matter value into a python value
+# -- input: value (string, already stripped), typed (bool, False keeps unquoted values as strings)
+# -- output: string, int, bool, None or list
+def parse_value(value, typed=True):
+    if value == "":
+        return None
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item.strip(), typed) for item in value[1:-1].split(",") if item.strip() != ""]
+    if not typed:
+        return value
+    if value in ("true", "false"):
+        return value == "true"
+    if INT_RE.fullmatch(value):
+        return int(value)
+    return value
+
+#Function to parse the lines between the front-matter fences
+# -- input: lines (iterable of strings)
+# -- output: metadata dict
+def parse_front_matter(lines):
+    metadata = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped == "" or stripped.startswith("#"):
+            continue
+        # "- item" lines continue the list of the key above them
+        if stripped.startswith("- ") or stripped == "-":
+            if key is None:
+                raise ValueError(f"invalid front matter line: {line}")
+            if not isinstance(metadata[key], list):
+                metadata[key] = []
+            metadata[key].append(parse_value(stripped[1:].strip(), key not in TEXT_KEYS))
+            continue
+        key, sep, value = line.partition(":")
+        if sep == "":
+            raise ValueError(f"invalid front matter line: {line}")
+        key = key.strip()
+        metadata[key] = parse_value(value.strip(), key not in TEXT_KEYS)
+
+    for list_key in LIST_KEYS:
+        value = metadata.get(list_key)
+        if isinstance(value, str):
+            metadata[list_key] = [item.strip() for item in value.split(",") if item.strip() != ""]
+        elif value is None and list_key in metadata:
+            metadata[list_key] = []
+    return metadata
+
+#Function to take the front matter off the start of an iterator of lines. The iterator is left
+#positioned at the first body line, so callers can keep reading from it.
+# -- input: lines (iterator of strings without line endings)
+# -- output: tuple (metadata dict, iterator of the body lines)
+def read_front_matter(lines):
+    first = next(lines, None)
+    if first is None:
+        return {}, lines
+    if first.rstrip() != FENCE:
+        return {}, itertools.chain([first], lines)
+
+    header = []
+    for line in lines:
+        if line.rstrip() == FENCE:
+            return parse_front_matter(header), lines
+        header.append(line)
+    raise ValueError("invalid front matter, closing --- not found")
+
+#Function to split the front matter off a markdown document
+# -- input: markdown (string)
+# -- output: tuple (metadata dict, markdown body without the front matter)
+def split_front_matter(markdown):
+    if not markdown.startswith(FENCE):
+        return {}, markdown
+    lines = iter(markdown.split("\n"))
+    metadata, body_lines = read_front_matter(lines)
+    return metadata, "\n".join(body_lines).lstrip("\n")
+
+#Function to read only the header of a markdown file: the front matter and the first H1.
+#Reading stops at the title (or at the end of the front matter when with_title is False), so the
+#body is never read or parsed. This is what listing, navigation and dependency features use to
+#scan large content trees.
+# -- input: path (Path), with_title (bool)
+# -- output: tuple (metadata dict, title string or None)
+def scan_metadata(path, with_title=True):
+    with open(path, "r") as f:
+        lines = (line.rstrip("\n") for line in f)
+        metadata, body_lines = read_front_matter(lines)
+        title = find_title(body_lines) if with_title else None
+    return metadata, title
@@ -0,0 +1,74 @@
+import hashlib
+import threading
+
+# Pygments is optional: without it only highlighters registered with register_highlighter are used
+try:
+    import pygments
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    pygments = None
+
+# language -> function(code, language) returning html, or None to leave the block as plain text
+HIGHLIGHTERS = {}
+# used for languages without a registered highlighter
+DEFAULT_LANGUAGE = "*"
+
+#Function to register a highlighter for a fence language ("*" registers the fallback)
+# -- input: language (string), highlighter (function taking code and language, returning html or None)
+def register_highlighter(language, highlighter):
+    HIGHLIGHTERS[language.lower()] = highlighter
+
+#Function to highlight code with Pygments
+# -- input: code (string), language (string)
+# -- output: html (string), or None if Pygments does not know the language
+def pygments_highlighter(code, language):
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        return None
+    return pygments.highlight(code, lexer, HtmlFormatter(nowrap=True))
+
+#Function to get the stylesheet for the Pygments classes
+# -- output: css (string), or None without Pygments
+def pygments_css():
+    if pygments is None:
+        return None
+    return HtmlFormatter().get_style_defs(".highlight")
+
+#Looks up the highlighter for a fence language and caches its output by (language, code digest), so a
+#snippet repeated across pages is only highlighted once per build. The cache is guarded by a lock, so
+#one instance can be shared by threads rendering pages concurrently.
+class CachedHighlighter():
+    def __init__(self, highlighters=None):
+        self.highlighters = HIGHLIGHTERS if highlighters is None else highlighters
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # -- input: code (string), language (string, from the code fence; may be empty)
+    # -- output: highlighted html (string), or None to render the code as plain text
+    def __call__(self, code, language):
+        language = language.lower()
+        highlighter = self.highlighters.get(language) or self.highlighters.get(DEFAULT_LANGUAGE)
+        if not language or highlighter is None:
+            return None
+
+        key = (language, hashlib.sha256(code.encode("utf-8")).digest())
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                return self.cache[key]
+        html = highlighter(code, language)
+        with self.lock:
+            self.misses += 1
+            self.cache[key] = html
+        return html
+
+    def __repr__(self):
+        return f"CachedHighlighter(languages: {sorted(self.highlighters)}, cached: {len(self.cache)}, hits: {self.hits}, misses: {self.misses})"
+
+if pygments is not None:
+    register_highlighter(DEFAULT_LANGUAGE, pygments_highlighter)
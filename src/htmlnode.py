@@ -1,3 +1,18 @@
+import io
+
+# escape text for use between tags. Most text has nothing to escape, so the membership checks
+# return the original string without building a copy
+def escape_text(text):
+   if "&" not in text and "<" not in text and ">" not in text:
+      return text
+   return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+# escape an attribute value for use inside double quotes, with the same fast path
+def escape_attribute(value):
+   if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+      return value
+   return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
 class HTMLNode():
    def __init__(self, tag=None, value=None, children=None, props=None):
       self.tag = tag
@@ -7,11 +22,23 @@ class HTMLNode():
 
    def to_html(self):
       raise NotImplementedError("to_html method not implemented")
+
+   # write the html for this node to a file-like object; parent nodes override this to stream their children
+   def write_html(self, out):
+      out.write(self.to_html())
    
    def props_to_html(self):
       if self.props is None:
          return ""
-      return "".join(f' {key}="{value}"' for key, value in self.props.items())
+      parts = []
+      for key, value in self.props.items():
+         if type(value) is not str:
+            value = str(value)
+         # checked inline: most attribute values need no escaping and this runs for every tag
+         if "&" in value or '"' in value or "<" in value or ">" in value:
+            value = escape_attribute(value)
+         parts.append(f' {key}="{value}"')
+      return "".join(parts)
 
    def __repr__(self):
       return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
@@ -25,14 +52,33 @@ class LeafNode(HTMLNode):
       if self.value is None:
          raise ValueError("LeafNode value is empty")
       
+      value = self.value
+      # checked inline rather than calling escape_text, since this runs for every text fragment
+      if "&" in value or "<" in value or ">" in value:
+         value = escape_text(value)
+
       if self.tag is None:
-         return self.value
+         return value
 
       if self.tag:
-         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+         props = self.props_to_html() if self.props else ""
+         return f"<{self.tag}{props}>{value}</{self.tag}>"
       
    def __repr__(self):
       return f"LeafNode({self.tag}, {self.value}, {self.props})"
+
+# a node holding html that is already safe (e.g. highlighter output) and is written without escaping
+class RawNode(HTMLNode):
+   def __init__(self, value):
+      super().__init__(None, value, None, None)
+
+   def to_html(self):
+      if self.value is None:
+         raise ValueError("RawNode value is empty")
+      return self.value
+
+   def __repr__(self):
+      return f"RawNode({self.value})"
    
 # create a parent node class that will handle the nesting of HTML nodes inside one another. Any HTML node that is not "leafnodes" are parent nodes
 class ParentNode(HTMLNode):
@@ -40,15 +86,22 @@ class ParentNode(HTMLNode):
       super().__init__(tag, None, children, props)
 
    def to_html(self):
+      out = io.StringIO()
+      self.write_html(out)
+      return out.getvalue()
+
+   # children may be any iterable, so large lists can be built lazily and serialized one child at a time
+   def write_html(self, out):
       if self.tag == None:
          raise ValueError("invalid HTML: no tag")
       
       if self.children == None:
          raise ValueError("invalid HTML: no children")
-      
-      children_html =  "".join(child.to_html() for child in self.children)
 
-      return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+      out.write(f"<{self.tag}{self.props_to_html()}>")
+      for child in self.children:
+         child.write_html(out)
+      out.write(f"</{self.tag}>")
    
       
    def __repr__(self):
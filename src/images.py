@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from util import atomic_write, copy_if_changed, write_if_changed
+
+# Pillow is optional: without it images still get width/height (png only) and lazy loading, but no variants
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+VARIANT_WIDTHS = (480, 960, 1440)
+DEFAULT_CACHE_DIR = ".cache/images"
+
+SRCSET_RE = re.compile(r'\bsrcset="([^"]*)"')
+
+#Function to read the dimensions of a png from its IHDR chunk without decoding it
+# -- input: path (Path)
+# -- output: tuple (width, height), or None if the file is not a png
+def read_png_size(path):
+    with open(path, "rb") as f:
+        header = f.read(24)
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+#Function to build the output path of a resized webp variant, e.g. images/tom.png -> images/tom.444582ce.480w.webp
+# -- input: rel_path (string, "/" separated), digest (hex string), width (int)
+# -- output: relative path (string)
+def variant_name(rel_path, digest, width):
+    root = os.path.splitext(rel_path)[0]
+    return f"{root}.{digest[:8]}.{width}w.webp"
+
+#Function to produce (or reuse from the cache) the variants of a single image.
+#The cache is keyed by the source digest, so an image is only ever decoded and resized once.
+# -- input: source (Path), destination (Path), rel_path (string), digest (hex string), cache_dir (Path)
+# -- output: dict with "width", "height" and "variants" (list of (relative path, width))
+def process_image(source, destination, rel_path, digest, cache_dir):
+    info_path = os.path.join(cache_dir, f"{digest}.json")
+    info = None
+    if os.path.isfile(info_path):
+        with open(info_path) as f:
+            info = json.load(f)
+        # entries made without Pillow are redone once it is available
+        if not info["resized"] and Image is not None:
+            info = None
+    if info is None:
+        info = render_variants(os.path.join(source, rel_path), digest, cache_dir)
+        write_if_changed(info_path, json.dumps(info).encode("utf-8"))
+
+    variants = []
+    if info["widths"]:
+        os.makedirs(os.path.dirname(os.path.join(destination, rel_path)), exist_ok=True)
+    for width in info["widths"]:
+        rel_variant = variant_name(rel_path, digest, width)
+        cached = os.path.join(cache_dir, f"{digest}.{width}w.webp")
+        copy_if_changed(cached, os.path.join(destination, rel_variant))
+        variants.append((rel_variant, width))
+    return {"width": info["width"], "height": info["height"], "variants": variants}
+
+#Function to decode an image once and write its downscaled webp variants into the cache
+# -- input: path (Path), digest (hex string), cache_dir (Path)
+# -- output: dict with "width", "height", "widths" (list of variant widths written) and "resized"
+def render_variants(path, digest, cache_dir):
+    if Image is None:
+        size = read_png_size(path)
+        width, height = size if size is not None else (None, None)
+        return {"width": width, "height": height, "widths": [], "resized": False}
+
+    widths = []
+    with Image.open(path) as image:
+        width, height = image.size
+        for variant_width in VARIANT_WIDTHS:
+            if variant_width >= width:
+                break
+            variant_height = max(1, round(height * variant_width / width))
+            resized = image.resize((variant_width, variant_height), Image.LANCZOS)
+            cached = os.path.join(cache_dir, f"{digest}.{variant_width}w.webp")
+            atomic_write(cached, lambda tmp_path: resized.save(tmp_path, "WEBP", quality=80))
+            widths.append(variant_width)
+    return {"width": width, "height": height, "widths": widths, "resized": True}
+
+#Function to run the image stage over every copied image on a thread pool.
+# -- input: source (Path, static dir), destination (Path, output dir), hashes (dict of relative path -> digest
+#           from copy_files), workers (int, pool width), cache_dir (Path)
+# -- output: dict of "/image/url" -> extra img props for RenderContext.images
+def process_images(source, destination, hashes, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    if Image is None:
+        print("Pillow is not installed: skipping image variants, emitting dimensions and lazy loading only")
+    os.makedirs(cache_dir, exist_ok=True)
+    rel_paths = [rel_path for rel_path in sorted(hashes) if rel_path.lower().endswith(IMAGE_EXTENSIONS)]
+
+    def process_one(rel_path):
+        return rel_path, process_image(source, destination, rel_path, hashes[rel_path], cache_dir)
+
+    images = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rel_path, info in pool.map(process_one, rel_paths):
+            images["/" + rel_path] = image_props(rel_path, info)
+    print(f"Processed {len(images)} images")
+    return images
+
+#Function to turn processed image info into img props
+# -- input: rel_path (string), info (dict from process_image)
+# -- output: dict of img props
+def image_props(rel_path, info):
+    props = {}
+    if info["variants"]:
+        candidates = [f"/{rel_variant} {width}w" for rel_variant, width in info["variants"]]
+        candidates.append(f"/{rel_path} {info['width']}w")
+        props["srcset"] = ", ".join(candidates)
+    if info["width"] is not None:
+        props["width"] = str(info["width"])
+        props["height"] = str(info["height"])
+    props["loading"] = "lazy"
+    return props
+
+#Function to list the files an image stage's props point at, relative to the output directory
+# -- input: images (dict from process_images)
+# -- output: set of relative paths
+def image_outputs(images):
+    outputs = set()
+    for props in images.values():
+        if "srcset" in props:
+            for candidate in props["srcset"].split(", "):
+                outputs.add(candidate.split(" ")[0].lstrip("/"))
+    return outputs
+
+#Function to prefix the root-relative urls inside srcset attributes with the basepath,
+#the same way generate_page does for href and src
+# -- input: html (string), basepath (string)
+# -- output: html (string)
+def prefix_srcset(html, basepath):
+    def replace(match):
+        candidates = []
+        for candidate in match.group(1).split(", "):
+            if candidate.startswith("/"):
+                candidate = basepath + candidate[1:]
+            candidates.append(candidate)
+        return 'srcset="' + ", ".join(candidates) + '"'
+
+    return SRCSET_RE.sub(replace, html)
@@ -0,0 +1,197 @@
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlsplit
+
+DEFAULT_TIMEOUT = 10.0
+SKIPPED_SCHEMES = ("mailto", "tel", "javascript", "data")
+
+#Function to strip the query and fragment off a url
+# -- input: url (string)
+# -- output: path (string)
+def url_path(url):
+    return urlsplit(url).path
+
+#Function to find the line a link appears on in its markdown source. Only called for failures,
+#so the sources of pages without broken links are never read again.
+# -- input: source (Path), url (string)
+# -- output: line number (int), or None if it cannot be found
+def find_line(source, url):
+    try:
+        with open(source, "r") as f:
+            for number, line in enumerate(f, start=1):
+                if f"]({url})" in line:
+                    return number
+    except OSError:
+        return None
+    return None
+
+#Function to format a failure for the report
+# -- input: failure (dict with "source", "url", "kind" and "reason")
+# -- output: string like content/blog/tom/index.md:5: broken image /images/x.png (no such page or asset)
+def format_failure(failure):
+    line = find_line(failure["source"], failure["url"])
+    location = failure["source"] if line is None else f"{failure['source']}:{line}"
+    return f"{location}: broken {failure['kind']} {failure['url']} ({failure['reason']})"
+
+#Function to build the link checker's targets from what the build produced
+# -- input: pages (list of page metadata from RenderContext.pages), outputs (set of paths relative to the
+#           output directory, as collected for remove_stale_outputs)
+# -- output: set of root-relative urls
+def site_targets(pages, outputs):
+    targets = {page["url"] for page in pages}
+    targets.update("/" + rel_path for rel_path in outputs)
+    return targets
+
+#Checks the urls collected while rendering. Internal urls are resolved against an in-memory set of
+#the generated pages and copied assets, so no filesystem walk is needed. External urls are checked
+#concurrently over reused keep-alive connections, optionally all sent to one stand-in server.
+class LinkChecker():
+    # -- input: targets (iterable of root-relative urls that exist: page urls like /blog/tom/ and
+    #           asset urls like /images/tom.png), timeout (seconds), server ("host:port" of a stand-in
+    #           server that receives every external request, or None to contact the real hosts)
+    def __init__(self, targets, timeout=DEFAULT_TIMEOUT, server=None):
+        self.targets = set(targets)
+        self.timeout = timeout
+        self.server = server
+        self.local = threading.local()
+        self.opened = 0
+        self.open_connections = []
+        self.lock = threading.Lock()
+
+    #Function to check whether an internal url points at a generated page or copied asset
+    # -- input: path (root-relative url path)
+    # -- output: bool
+    def internal_exists(self, path):
+        if path in self.targets:
+            return True
+        if path.endswith("/index.html") and path[:-len("index.html")] in self.targets:
+            return True
+        # /blog/ is served by /blog/index.html
+        if path.endswith("/") and path + "index.html" in self.targets:
+            return True
+        # /blog/tom is served by /blog/tom/index.html
+        return not path.endswith("/") and path + "/" in self.targets
+
+    #Function to sort links into internal and external, resolving relative urls against their page
+    # -- input: links (list of dicts from RenderContext.links)
+    # -- output: tuple (internal links, external links), each link gaining a "target" key
+    def classify(self, links):
+        internal = []
+        external = []
+        for link in links:
+            parts = urlsplit(link["url"])
+            if parts.scheme in SKIPPED_SCHEMES or link["url"].startswith("#") or link["url"] == "":
+                continue
+            if parts.scheme in ("http", "https"):
+                external.append({**link, "target": link["url"]})
+            elif parts.scheme == "" and parts.netloc == "":
+                # targets are file paths, so %20 and friends are decoded before the lookup
+                target = unquote(url_path(urljoin(link["page"] or "/", link["url"])))
+                internal.append({**link, "target": target})
+            else:
+                external.append({**link, "target": link["url"]})
+        return internal, external
+
+    #Function to check internal links
+    # -- output: list of failures
+    def check_internal(self, links):
+        failures = []
+        for link in links:
+            if not self.internal_exists(link["target"]):
+                failures.append({**link, "reason": "no such page or asset"})
+        return failures
+
+    #Function to get this thread's connection for a host, opening it on first use
+    def connection(self, scheme, netloc):
+        connections = getattr(self.local, "connections", None)
+        if connections is None:
+            connections = self.local.connections = {}
+        key = (scheme, netloc) if self.server is None else ("http", self.server)
+        if key not in connections:
+            connection_class = http.client.HTTPSConnection if key[0] == "https" else http.client.HTTPConnection
+            connections[key] = connection_class(key[1], timeout=self.timeout)
+            with self.lock:
+                self.opened += 1
+                self.open_connections.append(connections[key])
+        return key, connections[key]
+
+    def drop_connection(self, key):
+        connection = self.local.connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+    #Function to request a url, retrying once when a kept-alive connection was closed by the server
+    # -- input: url (string)
+    # -- output: tuple (status or None, error message or None)
+    def fetch_status(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return None, f"unsupported scheme {parts.scheme}"
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        for attempt in range(2):
+            key, connection = self.connection(parts.scheme, parts.netloc)
+            try:
+                for method in ("HEAD", "GET"):
+                    connection.request(method, path, headers={"Host": parts.netloc})
+                    response = connection.getresponse()
+                    response.read()
+                    # some servers do not implement HEAD
+                    if method == "HEAD" and response.status in (405, 501):
+                        continue
+                    if response.will_close:
+                        self.drop_connection(key)
+                    return response.status, None
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as error:
+                self.drop_connection(key)
+                if attempt == 1:
+                    return None, str(error) or error.__class__.__name__
+            except (OSError, http.client.HTTPException) as error:
+                self.drop_connection(key)
+                return None, str(error) or error.__class__.__name__
+        return None, "no response"
+
+    #Function to check external links on a thread pool; each distinct url is requested once
+    # -- input: links (list), workers (int, pool width)
+    # -- output: list of failures
+    def check_external(self, links, workers=None):
+        urls = sorted({link["target"] for link in links})
+
+        def check_one(url):
+            status, error = self.fetch_status(url)
+            return url, status, error
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for url, status, error in pool.map(check_one, urls):
+                results[url] = (status, error)
+        # the worker threads are gone, close the connections they kept alive
+        for connection in self.open_connections:
+            connection.close()
+        self.open_connections = []
+
+        failures = []
+        for link in links:
+            status, error = results[link["target"]]
+            if error is not None:
+                failures.append({**link, "reason": error})
+            elif status >= 400:
+                failures.append({**link, "reason": f"HTTP {status}"})
+        return failures
+
+    #Function to check every collected link
+    # -- input: links (list of dicts from RenderContext.links), external (bool), workers (int)
+    # -- output: list of failures
+    def check(self, links, external=False, workers=None):
+        internal_links, external_links = self.classify(links)
+        failures = self.check_internal(internal_links)
+        if external:
+            failures.extend(self.check_external(external_links, workers))
+        print(f"Checked {len(internal_links)} internal and {len(external_links) if external else 0} external links, {len(failures)} broken")
+        return failures
+
+    def __repr__(self):
+        return f"LinkChecker(targets: {len(self.targets)}, server: {self.server}, timeout: {self.timeout})"
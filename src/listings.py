@@ -0,0 +1,151 @@
+import datetime
+import email.utils
+import os
+import shutil
+from xml.sax.saxutils import escape
+from htmlnode import LeafNode, ParentNode
+from util import fill_template, load_layout, write_if_changed
+
+PAGE_SIZE = 10
+FEED_SIZE = 20
+
+#Function to order pages newest first; undated pages come last, ordered by title
+# -- input: pages (list of page metadata dicts from RenderContext.pages)
+# -- output: sorted list
+def sort_pages(pages):
+    dated = sorted((page for page in pages if page["date"]), key=lambda page: (page["date"], page["url"]), reverse=True)
+    undated = sorted((page for page in pages if not page["date"]), key=lambda page: (page["title"], page["url"]))
+    return dated + undated
+
+#Function to build the absolute url of a root-relative page url
+# -- input: site_url (string, e.g. https://example.com), basepath (string), url (root-relative string)
+# -- output: absolute url (string)
+def absolute_url(site_url, basepath, url):
+    return site_url.rstrip("/") + basepath.rstrip("/") + url
+
+#Function to write sitemap.xml for every rendered page
+# -- input: pages (list of page metadata), output_dir (Path), site_url (string), basepath (string)
+# -- output: True if the file was written
+def write_sitemap(pages, output_dir, site_url, basepath):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for page in sorted(pages, key=lambda page: page["url"]):
+        lines.append("  <url>")
+        lines.append(f"    <loc>{escape(absolute_url(site_url, basepath, page['url']))}</loc>")
+        if page["date"]:
+            lines.append(f"    <lastmod>{escape(page['date'])}</lastmod>")
+        lines.append("  </url>")
+    lines.append("</urlset>")
+    return write_if_changed(os.path.join(output_dir, "sitemap.xml"), ("\n".join(lines) + "\n").encode("utf-8"))
+
+#Function to format a front-matter date (YYYY-MM-DD) as an RFC 822 date for RSS
+# -- input: date (string)
+# -- output: string, or None if the date is not ISO formatted
+def rss_date(date):
+    try:
+        parsed = datetime.date.fromisoformat(date)
+    except ValueError:
+        return None
+    return email.utils.format_datetime(datetime.datetime(parsed.year, parsed.month, parsed.day, tzinfo=datetime.timezone.utc))
+
+#Function to write an RSS 2.0 feed of the newest pages (everything except the site root)
+# -- input: pages (list of page metadata), output_dir (Path), site_url (string), basepath (string), title (string)
+# -- output: True if the file was written
+def write_feed(pages, output_dir, site_url, basepath, title):
+    items = [page for page in sort_pages(pages) if page["url"] != "/"][:FEED_SIZE]
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "  <channel>",
+        f"    <title>{escape(title)}</title>",
+        f"    <link>{escape(absolute_url(site_url, basepath, '/'))}</link>",
+        f"    <description>{escape(title)}</description>",
+    ]
+    for page in items:
+        link = escape(absolute_url(site_url, basepath, page["url"]))
+        lines.append("    <item>")
+        lines.append(f"      <title>{escape(page['title'])}</title>")
+        lines.append(f"      <link>{link}</link>")
+        lines.append(f"      <guid>{link}</guid>")
+        pub_date = rss_date(page["date"]) if page["date"] else None
+        if pub_date:
+            lines.append(f"      <pubDate>{pub_date}</pubDate>")
+        for tag in page["tags"]:
+            lines.append(f"      <category>{escape(tag)}</category>")
+        lines.append("    </item>")
+    lines.append("  </channel>")
+    lines.append("</rss>")
+    return write_if_changed(os.path.join(output_dir, "feed.xml"), ("\n".join(lines) + "\n").encode("utf-8"))
+
+#Function to build the root-relative url of a listing page; page 1 is the section index
+#unless a content page already lives there
+# -- input: section (string), number (int), index_taken (bool)
+# -- output: url (string)
+def listing_url(section, number, index_taken):
+    if number == 1 and not index_taken:
+        return f"/{section}/"
+    return f"/{section}/page/{number}/"
+
+#Function to render the html content of one listing page
+# -- input: pages (list of page metadata on this listing page), previous_url/next_url (string or None)
+# -- output: ParentNode
+def listing_to_html_node(pages, previous_url, next_url):
+    items = []
+    for page in pages:
+        children = [LeafNode("a", page["title"], {"href": page["url"]})]
+        if page["date"]:
+            children.append(LeafNode(None, " "))
+            children.append(LeafNode("time", page["date"], {"datetime": page["date"]}))
+        if page["tags"]:
+            children.append(LeafNode(None, " "))
+            children.append(LeafNode("small", ", ".join(page["tags"])))
+        items.append(ParentNode("li", children))
+    children = [ParentNode("ul", items)]
+
+    links = []
+    if previous_url is not None:
+        links.append(LeafNode("a", "Newer", {"href": previous_url, "rel": "prev"}))
+    if next_url is not None:
+        if links:
+            links.append(LeafNode(None, " "))
+        links.append(LeafNode("a", "Older", {"href": next_url, "rel": "next"}))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children)
+
+#Function to write the paginated listing pages of a section (e.g. blog) from the collected metadata.
+#Unchanged listing pages are not rewritten, and pages left over from a longer listing are removed.
+# -- input: pages (list of page metadata), section (string), template_path (Path), output_dir (Path),
+#           basepath (string), assets (optional asset manifest), context (optional RenderContext),
+#           page_size (int)
+# -- output: dict with "urls" (root-relative urls of the listing pages) and "written" (count)
+def write_listing(pages, section, template_path, output_dir, basepath, assets=None, context=None, page_size=PAGE_SIZE):
+    prefix = f"/{section}/"
+    index_taken = any(page["url"] == prefix for page in pages)
+    entries = sort_pages([page for page in pages if page["url"].startswith(prefix) and page["url"] != prefix])
+    chunks = [entries[start:start + page_size] for start in range(0, len(entries), page_size)] or [[]]
+
+    layout = load_layout(template_path, context)
+
+    title = section.replace("-", " ").title()
+    result = {"urls": [], "written": 0}
+    for number, chunk in enumerate(chunks, start=1):
+        previous_url = listing_url(section, number - 1, index_taken) if number > 1 else None
+        next_url = listing_url(section, number + 1, index_taken) if number < len(chunks) else None
+        content = listing_to_html_node(chunk, previous_url, next_url).to_html()
+        page_title = title if number == 1 else f"{title} (page {number})"
+        html = fill_template(layout, page_title, content, basepath, assets, context)
+
+        url = listing_url(section, number, index_taken)
+        result["urls"].append(url)
+        if write_if_changed(os.path.join(output_dir, url.strip("/"), "index.html"), html.encode("utf-8")):
+            result["written"] += 1
+
+    # drop listing pages beyond the current last one
+    page_dir = os.path.join(output_dir, section, "page")
+    if os.path.isdir(page_dir):
+        for name in os.listdir(page_dir):
+            if name.isdigit() and listing_url(section, int(name), index_taken) not in result["urls"]:
+                shutil.rmtree(os.path.join(page_dir, name))
+
+    print(f"Listing {section}: {len(entries)} pages on {len(chunks)} listing pages, {result['written']} written")
+    return result
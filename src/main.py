@@ -1,15 +1,95 @@
+import argparse
+import os
 import sys
-from util import copy_files, generate_page_recursive
+from util import copy_files, generate_page_recursive, list_files, remove_stale_outputs, write_if_changed
+from assets import fingerprint_assets, MANIFEST_NAME
+from images import image_outputs, process_images
+from rendercontext import RenderContext
+from search import SearchIndex
+from listings import write_feed, write_listing, write_sitemap
+from templates import TemplateSet
+from buildcache import BuildCache, DEFAULT_CACHE_PATH
+from highlight import CachedHighlighter, pygments_css
+from links import LinkChecker, DEFAULT_TIMEOUT, format_failure, site_targets
 
 default_basepath = "/"
 
 def main():
+   parser = argparse.ArgumentParser(description="Build the site from content/ and static/ into docs/.")
+   parser.add_argument("basepath", nargs="?", default=default_basepath, help="url prefix the site is served under")
+   parser.add_argument("--fingerprint", action="store_true", help="emit content-hashed copies of static files and point pages at them")
+   parser.add_argument("--images", action="store_true", help="generate resized webp variants and add srcset, width/height and lazy loading to images")
+   parser.add_argument("--search", action="store_true", help="write a prefix-searchable index of every page to docs/search")
+   parser.add_argument("--listing", action="append", default=[], metavar="SECTION", help="write paginated listing pages for a content section, e.g. blog (repeatable)")
+   parser.add_argument("--site-url", default=None, help="absolute url of the site, e.g. https://example.com; writes sitemap.xml and feed.xml when set")
+   parser.add_argument("--highlight", action="store_true", help="syntax highlight fenced code blocks by language (uses Pygments when installed) and write docs/highlight.css")
+   parser.add_argument("--force", action="store_true", help="render every page, even ones that are up to date")
+   parser.add_argument("--workers", type=int, default=None, help="thread pool width for copying, image processing and link checking")
+   parser.add_argument("--check-links", action="store_true", help="render every page and fail the build if a link or image points at a page or file that was not generated")
+   parser.add_argument("--check-external", action="store_true", help="with --check-links, also request every external url and fail on errors")
+   parser.add_argument("--link-server", default=None, metavar="HOST:PORT", help="send every external link request to this server instead of the real hosts, e.g. a local stand-in")
+   parser.add_argument("--link-timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds to wait for each external link")
+   args = parser.parse_args()
 
-   basepath = default_basepath
-   if len(sys.argv) > 1:
-       basepath = sys.argv[1]
+   copied = copy_files("static", "docs", workers=args.workers, hash_files=args.fingerprint or args.images)
+   assets = fingerprint_assets("docs", copied["hashes"]) if args.fingerprint else None
+   images = process_images("static", "docs", copied["hashes"], workers=args.workers) if args.images else None
+   search_index = SearchIndex.load("docs/search") if args.search else None
+   highlighter = None
+   stylesheets = []
+   if args.highlight:
+      highlighter = CachedHighlighter()
+      css = pygments_css()
+      if css is None:
+         print("Pygments is not installed: only registered highlighters are used")
+      else:
+         write_if_changed("docs/highlight.css", css.encode("utf-8"))
+         stylesheets.append("/highlight.css")
+   # anything that changes the html of every page belongs in the cache settings
+   settings = {"basepath": args.basepath, "assets": assets, "images": images, "highlight": args.highlight, "stylesheets": stylesheets}
+   # links are collected while rendering, so checking them needs every page rendered
+   cache = BuildCache(DEFAULT_CACHE_PATH, settings) if args.force or args.check_links else BuildCache.load(DEFAULT_CACHE_PATH, settings)
+   context = RenderContext(images=images, search_index=search_index, output_dir="docs", templates=TemplateSet(), cache=cache, highlighter=highlighter, check_links=args.check_links, stylesheets=stylesheets)
+   pages = generate_page_recursive("content", "template.html", "docs", args.basepath, assets=assets, context=context)
+   cache.save()
+   if search_index is not None:
+      search_index.prune_untouched()
+      search_index.write("docs/search")
 
-   copy_files("static", "docs")
-   generate_page_recursive("content", "template.html", "docs", basepath)
+   # sitemap, feed and listings all come from the metadata recorded during the render above
+   listing_urls = []
+   for section in args.listing:
+      listing_urls.extend(write_listing(context.pages, section, "template.html", "docs", args.basepath, assets, context)["urls"])
+   if args.site_url:
+      site_title = next((page["title"] for page in context.pages if page["url"] == "/"), args.site_url)
+      write_sitemap(context.pages + [{"url": url, "date": None} for url in listing_urls], "docs", args.site_url, args.basepath)
+      write_feed(context.pages, "docs", args.site_url, args.basepath, site_title)
+
+   # everything this build produced; whatever else is in docs/ is left over from deleted sources
+   outputs = set(copied["paths"])
+   outputs.update(os.path.relpath(path, "docs").replace(os.sep, "/") for path in pages["paths"])
+   outputs.update(url.strip("/") + "/index.html" for url in listing_urls)
+   if assets is not None:
+      outputs.update(url.lstrip("/") for url in assets.values())
+      outputs.add(MANIFEST_NAME)
+   if images is not None:
+      outputs.update(image_outputs(images))
+   if search_index is not None:
+      outputs.update("search/" + rel_path for rel_path in list_files("docs/search"))
+   outputs.update(url.lstrip("/") for url in stylesheets)
+   if args.site_url:
+      outputs.update(("sitemap.xml", "feed.xml"))
+   remove_stale_outputs("docs", outputs)
+
+   print(f"Static files: {copied['written']} written, {copied['unchanged']} unchanged")
+   print(f"Pages: {pages['written']} written, {pages['unchanged']} unchanged")
+
+   if args.check_links:
+      checker = LinkChecker(site_targets(context.pages, outputs), timeout=args.link_timeout, server=args.link_server)
+      failures = checker.check(context.links, external=args.check_external, workers=args.workers)
+      for failure in failures:
+         print(format_failure(failure))
+      if failures:
+         sys.exit(1)
    
-main()
\ No newline at end of file
+main()
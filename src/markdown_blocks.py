@@ -1,5 +1,5 @@
 from enum import Enum
-from htmlnode import ParentNode
+from htmlnode import ParentNode, RawNode
 from textnode import TextNode, TextType
 from util import text_to_textnode, text_node_to_html_node
 import re
@@ -22,68 +22,101 @@ def markdown_to_blocks(markdown):
             blocks.append(line)
     return blocks
 
+#Function to iterate over the lines of a block without splitting it into a list first
+# -- input: block (string)
+# -- output: generator of line strings
+def iter_block_lines(block):
+    start = 0
+    while True:
+        end = block.find("\n", start)
+        if end == -1:
+            yield block[start:]
+            return
+        yield block[start:end]
+        start = end + 1
+
+#Lazy, re-iterable children for a ParentNode. Each line of the block is turned into a node only
+#when the parent is serialized, so huge lists (and tables) never hold every row in memory at once.
+class LazyChildren():
+    def __init__(self, block, line_to_html_node, context=None):
+        self.block = block
+        self.line_to_html_node = line_to_html_node
+        self.context = context
+
+    def __iter__(self):
+        for line in iter_block_lines(self.block):
+            yield self.line_to_html_node(line, self.context)
+
+    def __repr__(self):
+        return f"LazyChildren({self.line_to_html_node.__name__}, lines: {self.block.count(chr(10)) + 1})"
+
 def block_to_block_type(block):
-    lines = block.strip().split("\n")
+    stripped = block.strip()
+    first_line = next(iter_block_lines(stripped))
     # Code block check (entire block surrounded by three backticks)
     if block.startswith("```") and block.endswith("```"):
         return BlockType.CODE
     # Heading check (line starts with 1-6 '#' followed by space)
-    if re.match(r"^#{1,6} ", lines[0]):
+    if re.match(r"^#{1,6} ", first_line):
         return BlockType.HEADING
     # Quote check (every line starts with "> ")
-    if all(line.startswith("> ") for line in lines):
+    if all(line.startswith("> ") for line in iter_block_lines(stripped)):
         return BlockType.QUOTE
     # Unordered list check (each line starts with "- ")
-    if all(line.startswith("- ") for line in lines):
+    if all(line.startswith("- ") for line in iter_block_lines(stripped)):
         return BlockType.UNORDERED_LIST
     # Ordered list check (each line starts with "1. ", "2. ", etc.)
-    if all(re.match(r"^\d+\.\s", line) for line in lines):
+    if all(re.match(r"^\d+\.\s", line) for line in iter_block_lines(stripped)):
         return BlockType.ORDERED_LIST
     # If nothing else matches, it's a paragraph
     return BlockType.PARAGRAPH
 
-def markdown_to_html_node(markdown):
+# context is an optional RenderContext carrying per-build rendering state
+def markdown_to_html_node(markdown, context=None):
    # split markdown into blocks
    blocks = markdown_to_blocks(markdown)
    children = []
    for block in blocks:
-      html_node = block_to_html_node(block)
+      html_node = block_to_html_node(block, context)
       children.append(html_node)
    return ParentNode("div", children)
 
-def block_to_html_node(block):
+def block_to_html_node(block, context=None):
     block_type = block_to_block_type(block)
     match block_type:
         case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
+            return paragraph_to_html_node(block, context)
         case BlockType.HEADING:
-            return heading_to_html_node(block)
+            return heading_to_html_node(block, context)
         case BlockType.CODE:
-            return code_to_html_node(block)
+            return code_to_html_node(block, context)
         case BlockType.ORDERED_LIST:
-            return ordered_list_to_html_node(block)
+            return ordered_list_to_html_node(block, context)
         case BlockType.UNORDERED_LIST:
-            return unordered_list_to_html_node(block)
+            return unordered_list_to_html_node(block, context)
         case BlockType.QUOTE:
-            return quote_to_html_node(block)
+            return quote_to_html_node(block, context)
         case _:
             raise ValueError(f"invalid block type: {block_type}")
 
-def text_to_children(text):
+def text_to_children(text, context=None):
    text_nodes = text_to_textnode(text)
+   if context is not None:
+      context.record_text(text_nodes)
+      context.record_links(text_nodes)
    nodes = []
    for text_node in text_nodes:
-      html_node = text_node_to_html_node(text_node)
+      html_node = text_node_to_html_node(text_node, context)
       nodes.append(html_node)
    return nodes
 
-def paragraph_to_html_node(block):
+def paragraph_to_html_node(block, context=None):
     lines = block.split("\n")
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, context)
     return ParentNode("p", children)
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, context=None):
     level = 0
     # count the number of '#' characters at the beginning of the line
     for char in block:
@@ -94,39 +127,56 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1:]
-    children = text_to_children(text)
+    if context is not None:
+        context.record_heading(text)
+    children = text_to_children(text, context)
     return ParentNode(f"h{level}", children)
 
-def code_to_html_node(block):
+#the text after the opening ``` is the fence language; with a context highlighter for that language
+#the code is emitted as highlighted html instead of plain text
+def code_to_html_node(block, context=None):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
-    code = block[4:-3]
+    first_newline = block.find("\n")
+    if first_newline == -1:
+        language = ""
+        code = block[3:-3]
+    else:
+        language = block[3:first_newline].strip()
+        code = block[first_newline + 1:-3]
     text_node = TextNode(code, TextType.TEXT)
+    if context is not None:
+        context.record_text([text_node])
+
+    highlighted = None
+    if context is not None and context.highlighter is not None:
+        highlighted = context.highlighter(code, language)
+    if highlighted is not None:
+        child = RawNode(highlighted)
+        code = ParentNode("code", [child], {"class": f"language-{language}"})
+        return ParentNode("pre", [code], {"class": "highlight"})
+
     child = text_node_to_html_node(text_node)
-    code = ParentNode("code", [child])
+    code = ParentNode("code", [child], {"class": f"language-{language}"} if language else None)
     return ParentNode("pre", [code])
 
-def ordered_list_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[3:]
-        children = text_to_children(text)
-        html_item = ParentNode("li", children)
-        html_items.append(html_item)
-    return ParentNode("ol", html_items)
-
-def unordered_list_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[2:]
-        children = text_to_children(text)
-        html_item = ParentNode("li", children)
-        html_items.append(html_item)
-    return ParentNode("ul", html_items)
-
-def quote_to_html_node(block):
+def ordered_list_item_to_html_node(item, context=None):
+    text = item[3:]
+    children = text_to_children(text, context)
+    return ParentNode("li", children)
+
+def ordered_list_to_html_node(block, context=None):
+    return ParentNode("ol", LazyChildren(block, ordered_list_item_to_html_node, context))
+
+def unordered_list_item_to_html_node(item, context=None):
+    text = item[2:]
+    children = text_to_children(text, context)
+    return ParentNode("li", children)
+
+def unordered_list_to_html_node(block, context=None):
+    return ParentNode("ul", LazyChildren(block, unordered_list_item_to_html_node, context))
+
+def quote_to_html_node(block, context=None):
     lines = block.split("\n")
     new_lines = []
     for line in lines:
@@ -134,15 +184,38 @@ def quote_to_html_node(block):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, context)
     return ParentNode("blockquote", children)
 
+#Function to group lines into stripped blocks lazily, splitting on empty lines the same way
+#markdown_to_blocks splits on blank lines
+# -- input: lines (iterable of strings without line endings)
+# -- output: generator of block strings
+def iter_blocks(lines):
+    block = []
+    for line in lines:
+        if line == "":
+            text = "\n".join(block).strip()
+            if text != "":
+                yield text
+            block = []
+        else:
+            block.append(line)
+    text = "\n".join(block).strip()
+    if text != "":
+        yield text
+
+#Function to find the first H1 in a stream of lines, reading no further than the block that holds it
+# -- input: lines (iterable of strings without line endings)
+# -- output: title (string) or None
+def find_title(lines):
+    for block in iter_blocks(lines):
+        if block.startswith("# "):
+            return block[2:]
+    return None
+
 def extract_title(markdown):
-    blocks = markdown_to_blocks(markdown)
-    if len(blocks) > 0:
-        for block in blocks:
-            block = block.strip()
-            if block.startswith("# "):
-                return block[2:]
-  
-    raise Exception("No H1 title found")
\ No newline at end of file
+    title = find_title(iter_block_lines(markdown))
+    if title is None:
+        raise Exception("No H1 title found")
+    return title
@@ -0,0 +1,94 @@
+import os
+from textnode import TextType
+
+#Optional per-build state threaded through markdown rendering. Every field is optional, so
+#markdown_to_html_node(markdown) without a context renders exactly as before.
+# -- images: dict of "/image/url" -> extra img props (srcset, width, height, loading) from the image stage
+# -- search_index: SearchIndex that rendered pages are added to; page text is only collected when set
+# -- output_dir: the site output directory, used to turn output paths into page urls
+# -- templates: TemplateSet holding the layouts compiled for this build
+# -- cache: BuildCache used to skip pages whose source and layout are unchanged
+# -- highlighter: function(code, language) returning highlighted html or None, used for fenced code blocks
+# -- check_links: collect the url of every rendered link and image into links, for the link checker
+# -- stylesheets: root-relative urls of extra stylesheets (e.g. /highlight.css), linked from the layout's
+#    {{ Stylesheets }} variable
+#The metadata of every rendered page is gathered in pages, so sitemaps, feeds and listings can be
+#built from the main render pass without reading the markdown again.
+class RenderContext():
+   def __init__(self, images=None, search_index=None, output_dir=None, templates=None, cache=None, highlighter=None, check_links=False, stylesheets=None):
+      self.images = images
+      self.search_index = search_index
+      self.output_dir = output_dir
+      self.templates = templates
+      self.cache = cache
+      self.highlighter = highlighter
+      self.check_links = check_links
+      self.stylesheets = stylesheets or []
+      self.pages = []
+      self.links = []
+      self.text = []
+      self.headings = []
+      self.source = None
+      self.url = None
+
+   #Function to reset the per-page text collected while rendering
+   def begin_page(self):
+      self.text = []
+      self.headings = []
+
+   #Function to record a rendered page's metadata
+   # -- input: source (Path, the markdown file), url (root-relative url string), title (string),
+   #           metadata (dict from the front matter; "date" and "tags" are picked up when present)
+   def record_page(self, source, url, title, metadata):
+      self.source = source
+      self.url = url
+      self.pages.append({
+         "source": source,
+         "url": url,
+         "title": title,
+         "date": metadata.get("date"),
+         "tags": metadata.get("tags", []),
+      })
+
+   #Function to collect the plain text of rendered TextNodes for the search index
+   # -- input: text_nodes (list of TextNode)
+   def record_text(self, text_nodes):
+      if self.search_index is None:
+         return
+      for text_node in text_nodes:
+         self.text.append(text_node.text)
+
+   #Function to collect the urls of rendered links and images for the link checker
+   # -- input: text_nodes (list of TextNode)
+   def record_links(self, text_nodes):
+      if not self.check_links:
+         return
+      for text_node in text_nodes:
+         if text_node.text_type in (TextType.LINK, TextType.IMAGE):
+            self.links.append({
+               "source": self.source,
+               "page": self.url,
+               "url": text_node.url,
+               "kind": text_node.text_type.value,
+            })
+
+   #Function to collect a heading's text for the search index
+   # -- input: text (string)
+   def record_heading(self, text):
+      if self.search_index is None:
+         return
+      self.headings.append(text)
+
+   #Function to turn an output file path into the url it is served at
+   # -- input: dest_path (Path), basepath (string)
+   # -- output: url (string), e.g. docs/blog/tom/index.html -> /blog/tom/
+   def page_url(self, dest_path, basepath):
+      rel_path = os.path.relpath(dest_path, self.output_dir or ".").replace(os.sep, "/")
+      if rel_path == "index.html":
+         rel_path = ""
+      elif rel_path.endswith("/index.html"):
+         rel_path = rel_path[:-len("index.html")]
+      return basepath + rel_path
+
+   def __repr__(self):
+      return f"RenderContext(images: {len(self.images or {})}, search_index: {self.search_index}, output_dir: {self.output_dir}, pages: {len(self.pages)})"
@@ -0,0 +1,177 @@
+import json
+import os
+import re
+import unicodedata
+from util import write_if_changed
+
+# terms are sharded by their first PREFIX_LENGTH characters, so a client only downloads the
+# shard for what the user has typed so far instead of the whole corpus
+PREFIX_LENGTH = 2
+PAGES_FILE = "pages.json"
+TERMS_DIR = "terms"
+
+TITLE_WEIGHT = 10
+HEADING_WEIGHT = 5
+
+# runs of unicode letters and digits
+TOKEN_RE = re.compile(r"[^\W_]+")
+SAFE_SHARD_RE = re.compile(r"[a-z0-9]+")
+
+#Function to casefold text and strip accents, so Númenor, numenor and NÚMENOR are the same term
+# -- input: text (string)
+# -- output: folded text (string)
+def fold(text):
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+#Function to split text into folded search terms
+# -- input: text (string)
+# -- output: list of terms
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text))
+
+#Function to name the shard file of a term prefix. Ascii prefixes are used as they are; any other
+#prefix (e.g. from a non-latin script) is hex encoded, so every shard name is a safe filename.
+# -- input: prefix (string)
+# -- output: shard name (string, without .json)
+def shard_name(prefix):
+    if SAFE_SHARD_RE.fullmatch(prefix):
+        return prefix
+    return "_" + prefix.encode("utf-8").hex()
+
+#A compact inverted index written as sharded json:
+#  pages.json            list of {"url", "title"}, the position is the page id (null for removed pages)
+#  terms/<prefix>.json   {term: [[page id, score], ...]} for every term starting with <prefix>, named
+#                        by shard_name
+#Page ids are stable across builds, so an incremental build only rewrites the shards it touched.
+class SearchIndex():
+    def __init__(self):
+        self.ids = {}
+        self.pages = []
+        self.terms = {}
+        self.touched = set()
+
+    #Function to add or replace a page in the index
+    # -- input: url (string), title (string), headings (list of string), text (list of string)
+    def add_page(self, url, title, headings, text):
+        if url in self.ids:
+            page_id = self.ids[url]
+        elif None in self.pages:
+            page_id = self.pages.index(None)
+        else:
+            page_id = len(self.pages)
+            self.pages.append(None)
+        self.ids[url] = page_id
+        self.pages[page_id] = {"url": url, "title": title}
+
+        scores = {}
+        for chunk in text:
+            for term in tokenize(chunk):
+                scores[term] = scores.get(term, 0) + 1
+        for heading in headings:
+            for term in tokenize(heading):
+                scores[term] = scores.get(term, 0) + HEADING_WEIGHT
+        for term in tokenize(title):
+            scores[term] = scores.get(term, 0) + TITLE_WEIGHT
+        self.terms[page_id] = scores
+        self.touched.add(url)
+
+    #Function to remove a page from the index, leaving its id free for reuse
+    # -- input: url (string)
+    def remove_page(self, url):
+        page_id = self.ids.pop(url, None)
+        if page_id is None:
+            return
+        self.pages[page_id] = None
+        self.terms.pop(page_id, None)
+        self.touched.discard(url)
+
+    #Function to keep a page from the previous build whose output is up to date
+    # -- input: url (string)
+    # -- output: True if the page is in the index, False if it has to be rendered and added
+    def keep_page(self, url):
+        if url not in self.ids:
+            return False
+        self.touched.add(url)
+        return True
+
+    #Function to drop pages that were not added during this build (their source was deleted)
+    def prune_untouched(self):
+        for url in list(self.ids):
+            if url not in self.touched:
+                self.remove_page(url)
+
+    #Function to look up pages by term prefix, the same way a static client would
+    # -- input: prefix (string)
+    # -- output: list of urls ordered by score
+    def search(self, prefix):
+        prefix = fold(prefix)
+        totals = {}
+        for page_id, scores in self.terms.items():
+            for term, score in scores.items():
+                if term.startswith(prefix):
+                    totals[page_id] = totals.get(page_id, 0) + score
+        ranked = sorted(totals, key=lambda page_id: (-totals[page_id], page_id))
+        return [self.pages[page_id]["url"] for page_id in ranked]
+
+    #Function to write the index into directory. Only shards whose content changed are rewritten,
+    #and shards that no longer have any terms are removed.
+    # -- input: directory (Path)
+    # -- output: number of files written
+    def write(self, directory):
+        shards = {}
+        for page_id in sorted(self.terms):
+            for term, score in self.terms[page_id].items():
+                shard = shards.setdefault(shard_name(term[:PREFIX_LENGTH]), {})
+                shard.setdefault(term, []).append([page_id, score])
+
+        terms_dir = os.path.join(directory, TERMS_DIR)
+        os.makedirs(terms_dir, exist_ok=True)
+        written = 0
+        for name, shard in shards.items():
+            data = json.dumps(shard, sort_keys=True, separators=(",", ":"))
+            if write_if_changed(os.path.join(terms_dir, f"{name}.json"), data.encode("utf-8")):
+                written += 1
+        for name in os.listdir(terms_dir):
+            if name.endswith(".json") and name[:-len(".json")] not in shards:
+                os.remove(os.path.join(terms_dir, name))
+
+        data = json.dumps(self.pages, separators=(",", ":"))
+        if write_if_changed(os.path.join(directory, PAGES_FILE), data.encode("utf-8")):
+            written += 1
+        print(f"Search index: {len(self.ids)} pages, {len(shards)} shards, {written} files written")
+        return written
+
+    #Function to load a previously written index so a build can update it incrementally
+    # -- input: directory (Path)
+    # -- output: SearchIndex (empty if nothing was written there yet)
+    @classmethod
+    def load(cls, directory):
+        index = cls()
+        pages_path = os.path.join(directory, PAGES_FILE)
+        if not os.path.isfile(pages_path):
+            return index
+        with open(pages_path) as f:
+            index.pages = json.load(f)
+        for page_id, page in enumerate(index.pages):
+            if page is not None:
+                index.ids[page["url"]] = page_id
+                index.terms[page_id] = {}
+
+        terms_dir = os.path.join(directory, TERMS_DIR)
+        if os.path.isdir(terms_dir):
+            for name in os.listdir(terms_dir):
+                if not name.endswith(".json"):
+                    continue
+                with open(os.path.join(terms_dir, name)) as f:
+                    shard = json.load(f)
+                for term, postings in shard.items():
+                    for page_id, score in postings:
+                        if page_id in index.terms:
+                            index.terms[page_id][term] = score
+        return index
+
+    def __repr__(self):
+        return f"SearchIndex(pages: {len(self.ids)})"
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import re
+
+#Layouts are html files with a small template syntax:
+#
+#   {{ Title }} / {{ Content }}     replaced with the page title / rendered html; any other
+#                                   {{ name }} is looked up in the page's front matter
+#   {% extends "template.html" %}   must be the first tag; the layout fills the parent's blocks
+#   {% block name %}...{% endblock %}
+#                                   a region a child layout can override; the content between
+#                                   the tags is the default
+#   {% include "partial.html" %}    inserts another file in place
+#
+#Layout names are looked up in each of the search directories in turn (layouts/ and then the
+#project root, so the existing template.html keeps working). A layout is compiled once per build
+#into a flat render plan of literal strings and variables; rendering a page is then one join.
+
+DEFAULT_SEARCH_DIRS = ("layouts", ".")
+
+TAG_RE = re.compile(r"({%.*?%}|{{.*?}})", re.DOTALL)
+EXTENDS_RE = re.compile(r'{%\s*extends\s+"([^"]+)"\s*%}')
+INCLUDE_RE = re.compile(r'{%\s*include\s+"([^"]+)"\s*%}')
+BLOCK_RE = re.compile(r"{%\s*block\s+(\w+)\s*%}")
+ENDBLOCK_RE = re.compile(r"{%\s*endblock\s*(\w+)?\s*%}")
+VAR_RE = re.compile(r"{{\s*(\w+)\s*}}")
+
+#A compiled layout: segments is a list of literal strings and ("var", name, raw text) tuples.
+#digest covers the content of every file the layout was built from, so it changes exactly when
+#the output of pages using this layout could change.
+class Layout():
+    def __init__(self, name, segments, dependencies, digest):
+        self.name = name
+        self.segments = segments
+        self.dependencies = dependencies
+        self.digest = digest
+
+    #Function to render the plan
+    # -- input: variables (dict of name -> string)
+    # -- output: html (string); unknown variables are left as written
+    def render(self, variables):
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+            else:
+                value = variables.get(segment[1])
+                parts.append(segment[2] if value is None else str(value))
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"Layout({self.name}, segments: {len(self.segments)}, dependencies: {self.dependencies})"
+
+#Loads, compiles and caches layouts for one build.
+class TemplateSet():
+    def __init__(self, search_dirs=DEFAULT_SEARCH_DIRS):
+        self.search_dirs = search_dirs
+        self.layouts = {}
+        self.sources = {}
+
+    #Function to find a layout file. The search directories are tried in order; a name with a directory
+    #part (e.g. src/template.html) is also accepted as a path of its own.
+    # -- input: name (string, a path or a name relative to one of the search directories)
+    # -- output: path (string)
+    def resolve(self, name):
+        for directory in self.search_dirs:
+            path = os.path.normpath(os.path.join(directory, name))
+            if os.path.isfile(path):
+                return path
+        if os.path.dirname(name) and os.path.isfile(name):
+            return name
+        raise ValueError(f"template not found: {name}")
+
+    def read(self, path):
+        if path not in self.sources:
+            with open(path, "r") as f:
+                self.sources[path] = f.read()
+        return self.sources[path]
+
+    #Function to get the compiled layout for a name, compiling it on first use
+    # -- input: name (string)
+    # -- output: Layout
+    def load(self, name):
+        path = self.resolve(name)
+        if path not in self.layouts:
+            dependencies = []
+            overrides, tree = self.compile_tree(path, {}, dependencies, [])
+            segments = []
+            self.flatten(tree, overrides, segments, dependencies, [path])
+            digest = hashlib.sha256()
+            for dependency in dependencies:
+                digest.update(dependency.encode("utf-8") + b"\0" + self.read(dependency).encode("utf-8") + b"\0")
+            self.layouts[path] = Layout(path, segments, dependencies, digest.hexdigest())
+        return self.layouts[path]
+
+    #Function to pick the layout for a page: the front matter "template" key wins, then a layout
+    #named after the page's top-level directory (layouts/blog.html for /blog/...), then the default.
+    #Section layouts are only looked up in the first search directory, so a stray blog.html in the
+    #project root never becomes the layout of /blog/.
+    # -- input: metadata (front matter dict), url (root-relative page url), default (string)
+    # -- output: Layout
+    def select(self, metadata, url, default):
+        name = metadata.get("template")
+        if name:
+            if not os.path.splitext(name)[1]:
+                name += ".html"
+            return self.load(name)
+        section = url.strip("/").split("/")[0]
+        # resolve tries the first search directory first, so this loads the file checked here
+        if section and os.path.isfile(os.path.join(self.search_dirs[0], f"{section}.html")):
+            return self.load(f"{section}.html")
+        return self.load(default)
+
+    #Function to parse a layout file into a tree of literals, ("var", name, raw), ("block", name, children)
+    #and ("include", name) nodes
+    # -- output: tuple (parent name or None, tree)
+    def parse(self, path):
+        source = self.read(path)
+        parent = None
+        root = []
+        stack = [("", root)]
+        for token in TAG_RE.split(source):
+            if token == "":
+                continue
+            children = stack[-1][1]
+            if token.startswith("{{"):
+                match = VAR_RE.fullmatch(token)
+                children.append(("var", match.group(1), token) if match else token)
+            elif token.startswith("{%"):
+                if EXTENDS_RE.fullmatch(token):
+                    if parent is not None or any(not (isinstance(node, str) and node.strip() == "") for node in root):
+                        raise ValueError(f"{path}: extends must be the first tag in a template")
+                    parent = EXTENDS_RE.fullmatch(token).group(1)
+                elif INCLUDE_RE.fullmatch(token):
+                    children.append(("include", INCLUDE_RE.fullmatch(token).group(1)))
+                elif BLOCK_RE.fullmatch(token):
+                    block = ("block", BLOCK_RE.fullmatch(token).group(1), [])
+                    children.append(block)
+                    stack.append((block[1], block[2]))
+                elif ENDBLOCK_RE.fullmatch(token):
+                    if len(stack) == 1:
+                        raise ValueError(f"{path}: endblock without block")
+                    stack.pop()
+                else:
+                    raise ValueError(f"{path}: unknown template tag {token}")
+            else:
+                children.append(token)
+        if len(stack) != 1:
+            raise ValueError(f"{path}: block {stack[-1][0]} is not closed")
+        return parent, root
+
+    #Function to walk up the extends chain. Blocks defined by a child override the same blocks in
+    #its parents.
+    # -- output: tuple (block overrides, tree of the top-most parent)
+    def compile_tree(self, path, overrides, dependencies, chain):
+        if path in chain:
+            raise ValueError(f"template extends itself: {' -> '.join(chain + [path])}")
+        dependencies.append(path)
+        parent, tree = self.parse(path)
+        if parent is None:
+            return overrides, tree
+        for node in tree:
+            if isinstance(node, tuple) and node[0] == "block" and node[1] not in overrides:
+                overrides[node[1]] = node[2]
+        return self.compile_tree(self.resolve(parent), overrides, dependencies, chain + [path])
+
+    #Function to flatten a tree into render-plan segments, applying block overrides and includes
+    def flatten(self, tree, overrides, segments, dependencies, chain):
+        for node in tree:
+            if isinstance(node, str):
+                if segments and isinstance(segments[-1], str):
+                    segments[-1] += node
+                else:
+                    segments.append(node)
+            elif node[0] == "var":
+                segments.append(node)
+            elif node[0] == "block":
+                self.flatten(overrides.get(node[1], node[2]), overrides, segments, dependencies, chain)
+            elif node[0] == "include":
+                path = self.resolve(node[1])
+                if path in chain:
+                    raise ValueError(f"template includes itself: {' -> '.join(chain + [path])}")
+                if path not in dependencies:
+                    dependencies.append(path)
+                self.flatten(self.parse(path)[1], overrides, segments, dependencies, chain + [path])
+
+    def __repr__(self):
+        return f"TemplateSet({self.search_dirs}, compiled: {len(self.layouts)})"
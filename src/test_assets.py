@@ -0,0 +1,43 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from assets import fingerprint_name, fingerprint_assets, rewrite_asset_urls, MANIFEST_NAME
+
+class TestAssets(unittest.TestCase):
+   def test_fingerprint_name(self):
+      self.assertEqual("images/tom.3f2a1c9d.png", fingerprint_name("images/tom.png", "3f2a1c9d0000"))
+      self.assertEqual("index.3f2a1c9d.css", fingerprint_name("index.css", "3f2a1c9d0000"))
+
+   def test_fingerprint_assets(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         with open(os.path.join(tmp, "index.css"), "wb") as f:
+            f.write(b"body {}")
+         digest = hashlib.sha256(b"body {}").hexdigest()
+         manifest = fingerprint_assets(tmp, {"index.css": digest})
+         expected = {"/index.css": f"/index.{digest[:8]}.css"}
+         self.assertEqual(expected, manifest)
+         self.assertTrue(os.path.isfile(os.path.join(tmp, f"index.{digest[:8]}.css")))
+         self.assertTrue(os.path.isfile(os.path.join(tmp, "index.css")))
+         with open(os.path.join(tmp, MANIFEST_NAME)) as f:
+            self.assertEqual(expected, json.load(f))
+
+   def test_rewrite_asset_urls(self):
+      manifest = {"/index.css": "/index.abc.css", "/images/tom.png": "/images/tom.abc.png"}
+      html = '<link href="/index.css" rel="stylesheet" /><img src="/images/tom.png" alt="Tom"></img><a href="/blog/tom">Tom</a>'
+      expected = '<link href="/index.abc.css" rel="stylesheet" /><img src="/images/tom.abc.png" alt="Tom"></img><a href="/blog/tom">Tom</a>'
+      self.assertEqual(expected, rewrite_asset_urls(html, manifest))
+
+   def test_rewrite_keeps_query_and_fragment(self):
+      manifest = {"/index.css": "/index.abc.css"}
+      self.assertEqual('href="/index.abc.css?v=2#x"', rewrite_asset_urls('href="/index.css?v=2#x"', manifest))
+
+   def test_rewrite_srcset_candidates(self):
+      manifest = {"/images/tom.png": "/images/tom.abc.png"}
+      html = '<img src="/images/tom.png" srcset="/images/tom.444582ce.480w.webp 480w, /images/tom.png 1200w" />'
+      expected = '<img src="/images/tom.abc.png" srcset="/images/tom.444582ce.480w.webp 480w, /images/tom.abc.png 1200w" />'
+      self.assertEqual(expected, rewrite_asset_urls(html, manifest))
+
+if __name__ == "__main__":
+   unittest.main()
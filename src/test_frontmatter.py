@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from frontmatter import split_front_matter, parse_front_matter, scan_metadata
+from markdown_blocks import extract_title
+
+class TestFrontMatter(unittest.TestCase):
+   def test_split_front_matter(self):
+      metadata, body = split_front_matter("---\ndate: 2024-05-01\ntags: [elves, balrogs]\n---\n# Title\n\nText")
+      self.assertEqual({"date": "2024-05-01", "tags": ["elves", "balrogs"]}, metadata)
+      self.assertEqual("# Title\n\nText", body)
+
+   def test_no_front_matter(self):
+      self.assertEqual(({}, "# Title"), split_front_matter("# Title"))
+
+   def test_unclosed_front_matter(self):
+      with self.assertRaises(ValueError):
+         split_front_matter("---\ndate: 2024-05-01\n# Title")
+
+   def test_yaml_values(self):
+      metadata = parse_front_matter([
+         'title: "Glorfindel: a reappraisal"',
+         "# a comment",
+         "draft: false",
+         "weight: 3",
+         "template: 'blog'",
+         "tags: elves, balrogs",
+         "authors:",
+         "  - Andrew",
+         "  - Tolkien",
+         "empty:",
+      ])
+      self.assertEqual(
+         {
+            "title": "Glorfindel: a reappraisal",
+            "draft": False,
+            "weight": 3,
+            "template": "blog",
+            "tags": ["elves", "balrogs"],
+            "authors": ["Andrew", "Tolkien"],
+            "empty": None,
+         },
+         metadata
+      )
+
+   def test_text_keys_stay_strings(self):
+      metadata = parse_front_matter(["date: 2024", "tags: [1, true]", "weight: --5", "offset: -5"])
+      self.assertEqual({"date": "2024", "tags": ["1", "true"], "weight": "--5", "offset": -5}, metadata)
+      self.assertEqual(["7", "elves"], parse_front_matter(["tags:", "  - 7", "  - elves"])["tags"])
+
+   def test_extract_title_skips_front_matter_lines(self):
+      self.assertEqual("Title", extract_title("Intro text\n\n# Title\n\n# Second"))
+      self.assertEqual("Title\nwraps", extract_title("# Title\nwraps\n\nbody"))
+
+class TestScanMetadata(unittest.TestCase):
+   def write(self, directory, data):
+      path = os.path.join(directory, "index.md")
+      with open(path, "wb") as f:
+         f.write(data)
+      return path
+
+   def test_scan_metadata(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         path = self.write(tmp, b"---\ndate: 2024-05-01\n---\n\n# The Title\n\nBody")
+         self.assertEqual(({"date": "2024-05-01"}, "The Title"), scan_metadata(path))
+         self.assertEqual(({"date": "2024-05-01"}, None), scan_metadata(path, with_title=False))
+
+   def test_scan_stops_before_body(self):
+      # bytes that are not valid utf-8 far into the body would fail if the body were read
+      with tempfile.TemporaryDirectory() as tmp:
+         path = self.write(tmp, b"# Title\n\n" + b"text\n" * 100000 + b"\xff\xfe")
+         self.assertEqual(({}, "Title"), scan_metadata(path))
+
+   def test_scan_without_title(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         path = self.write(tmp, b"no heading here")
+         self.assertEqual(({}, None), scan_metadata(path))
+
+if __name__ == "__main__":
+   unittest.main()
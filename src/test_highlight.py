@@ -0,0 +1,69 @@
+import os
+import unittest
+from highlight import CachedHighlighter, pygments, pygments_highlighter
+from markdown_blocks import code_to_html_node
+from rendercontext import RenderContext
+from templates import TemplateSet
+from util import fill_template
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+def shout(code, language):
+   return f"<span>{code.upper()}</span>"
+
+class TestHighlight(unittest.TestCase):
+   def test_plain_code_unchanged(self):
+      self.assertEqual("<pre><code>x = 1\n</code></pre>", code_to_html_node("```\nx = 1\n```").to_html())
+
+   def test_fence_language_is_not_code(self):
+      self.assertEqual(
+         '<pre><code class="language-python">x = 1\n</code></pre>',
+         code_to_html_node("```python\nx = 1\n```").to_html()
+      )
+
+   def test_highlighter_hook(self):
+      context = RenderContext(highlighter=CachedHighlighter({"python": shout}))
+      self.assertEqual(
+         '<pre class="highlight"><code class="language-python"><span>X = 1\n</span></code></pre>',
+         code_to_html_node("```python\nx = 1\n```", context).to_html()
+      )
+      # languages without a highlighter fall back to plain text
+      self.assertEqual(
+         '<pre><code class="language-go">x := 1\n</code></pre>',
+         code_to_html_node("```go\nx := 1\n```", context).to_html()
+      )
+
+   def test_cache_by_language_and_code(self):
+      calls = []
+      def counting(code, language):
+         calls.append((code, language))
+         return code
+      highlighter = CachedHighlighter({"python": counting, "py": counting})
+      highlighter("x = 1", "python")
+      highlighter("x = 1", "python")
+      highlighter("x = 1", "py")
+      highlighter("x = 2", "python")
+      self.assertEqual(3, len(calls))
+      self.assertEqual((1, 3), (highlighter.hits, highlighter.misses))
+
+   def test_fallback_and_no_language(self):
+      highlighter = CachedHighlighter({"*": shout})
+      self.assertEqual("<span>A</span>", highlighter("a", "anything"))
+      self.assertIsNone(highlighter("a", ""))
+
+   @unittest.skipIf(pygments is None, "Pygments is not installed")
+   def test_pygments(self):
+      self.assertIn('<span class="k">def</span>', pygments_highlighter("def f(): pass\n", "python"))
+      self.assertIsNone(pygments_highlighter("x", "not-a-language"))
+
+   def test_template_links_stylesheets(self):
+      layout = TemplateSet().load(TEMPLATE_PATH)
+      context = RenderContext(stylesheets=["/highlight.css"])
+      html = fill_template(layout, "Title", "<p>x</p>", "/base/", context=context)
+      self.assertIn('<link href="/base/highlight.css" rel="stylesheet" />', html)
+      html = fill_template(layout, "Title", "<p>x</p>", "/base/", context=RenderContext())
+      self.assertNotIn("highlight.css", html)
+      self.assertNotIn("{{", html)
+
+if __name__ == "__main__":
+   unittest.main()
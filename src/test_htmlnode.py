@@ -1,7 +1,7 @@
 import unittest
 
 from textnode import TextNode, TextType
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawNode, escape_text, escape_attribute
 from util import text_node_to_html_node
 
 class TestHTMLNode(unittest.TestCase):
@@ -97,5 +97,29 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
       self.assertEqual(html_node.value, "")
       self.assertEqual(html_node.props, {"src": "https://www.google.com", "alt": "This is an image"})
 
+class TestEscaping(unittest.TestCase):
+   def test_escape_text(self):
+      self.assertEqual("a &lt;b&gt; &amp; \"c\"", escape_text('a <b> & "c"'))
+
+   def test_escape_fast_path_returns_same_object(self):
+      text = "nothing to escape here, just 'quotes' and words"
+      self.assertIs(text, escape_text(text))
+      self.assertIs(text, escape_attribute(text))
+
+   def test_escape_attribute(self):
+      self.assertEqual("/a?b=1&amp;c=&quot;2&quot;", escape_attribute('/a?b=1&c="2"'))
+
+   def test_leaf_node_escapes_value(self):
+      self.assertEqual("<p>1 &lt; 2 &amp;&amp; 3 &gt; 2</p>", LeafNode("p", "1 < 2 && 3 > 2").to_html())
+      self.assertEqual("&lt; Back Home", LeafNode(None, "< Back Home").to_html())
+
+   def test_props_are_escaped(self):
+      node = LeafNode("a", "link", {"href": 'https://x.com/?q="a"&b=<c>'})
+      self.assertEqual('<a href="https://x.com/?q=&quot;a&quot;&amp;b=&lt;c&gt;">link</a>', node.to_html())
+
+   def test_raw_node_is_not_escaped(self):
+      node = ParentNode("code", [RawNode('<span class="k">def</span>')])
+      self.assertEqual('<code><span class="k">def</span></code>', node.to_html())
+
 if __name__ == "__main__":
    unittest.main()
\ No newline at end of file
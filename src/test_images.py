@@ -0,0 +1,79 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from images import Image, read_png_size, image_props, prefix_srcset, process_images
+from rendercontext import RenderContext
+from textnode import TextNode, TextType
+from util import text_node_to_html_node
+
+#Function to build a tiny valid png so tests do not depend on image files or Pillow
+def make_png(width, height):
+   def chunk(kind, data):
+      return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+   header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+   rows = b"".join(b"\x00" + b"\x80" * width for _ in range(height))
+   return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+class TestImages(unittest.TestCase):
+   def test_read_png_size(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         path = os.path.join(tmp, "a.png")
+         with open(path, "wb") as f:
+            f.write(make_png(12, 7))
+         self.assertEqual((12, 7), read_png_size(path))
+         with open(path, "wb") as f:
+            f.write(b"not a png")
+         self.assertIsNone(read_png_size(path))
+
+   def test_image_props(self):
+      info = {"width": 1000, "height": 500, "variants": [("images/a.abc.480w.webp", 480)]}
+      self.assertEqual(
+         {
+            "srcset": "/images/a.abc.480w.webp 480w, /images/a.png 1000w",
+            "width": "1000",
+            "height": "500",
+            "loading": "lazy"
+         },
+         image_props("images/a.png", info)
+      )
+
+   def test_prefix_srcset(self):
+      html = '<img srcset="/a.480w.webp 480w, https://x.com/b.png 900w">'
+      self.assertEqual(
+         '<img srcset="/base/a.480w.webp 480w, https://x.com/b.png 900w">',
+         prefix_srcset(html, "/base/")
+      )
+
+   def test_img_node_uses_context(self):
+      context = RenderContext(images={"/images/a.png": {"width": "12", "height": "7", "loading": "lazy"}})
+      node = text_node_to_html_node(TextNode("alt text", TextType.IMAGE, "/images/a.png"), context)
+      self.assertEqual(
+         {"src": "/images/a.png", "alt": "alt text", "width": "12", "height": "7", "loading": "lazy"},
+         node.props
+      )
+      plain = text_node_to_html_node(TextNode("alt text", TextType.IMAGE, "/images/b.png"), context)
+      self.assertEqual({"src": "/images/b.png", "alt": "alt text"}, plain.props)
+
+   def test_process_images_cached_by_hash(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         source = os.path.join(tmp, "static")
+         os.makedirs(os.path.join(source, "images"))
+         with open(os.path.join(source, "images", "a.png"), "wb") as f:
+            f.write(make_png(1000, 20))
+         cache_dir = os.path.join(tmp, "cache")
+         hashes = {"images/a.png": "abcdef0123456789", "index.css": "0123"}
+         images = process_images(source, os.path.join(tmp, "docs"), hashes, cache_dir=cache_dir)
+         self.assertEqual(["/images/a.png"], list(images))
+         self.assertEqual(("1000", "20", "lazy"), (images["/images/a.png"]["width"], images["/images/a.png"]["height"], images["/images/a.png"]["loading"]))
+         self.assertTrue(os.path.isfile(os.path.join(cache_dir, "abcdef0123456789.json")))
+         if Image is not None:
+            self.assertTrue(os.path.isfile(os.path.join(tmp, "docs", "images", "a.abcdef01.480w.webp")))
+
+         # a second run must come from the cache without opening the source image
+         os.remove(os.path.join(source, "images", "a.png"))
+         self.assertEqual(images, process_images(source, os.path.join(tmp, "docs"), hashes, cache_dir=cache_dir))
+
+if __name__ == "__main__":
+   unittest.main()
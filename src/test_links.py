@@ -0,0 +1,143 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from markdown_blocks import markdown_to_html_node
+from rendercontext import RenderContext
+from links import LinkChecker, format_failure, site_targets
+
+#Stand-in for the external hosts: /missing is a 404, /no-head rejects HEAD, everything else is a 200.
+#Requests are counted by Host header, connections by the server.
+class StandInHandler(BaseHTTPRequestHandler):
+   protocol_version = "HTTP/1.1"
+
+   def setup(self):
+      super().setup()
+      with self.server.lock:
+         self.server.connections += 1
+
+   def respond(self, body):
+      with self.server.lock:
+         self.server.requests.append((self.command, self.headers["Host"], self.path))
+      if self.path == "/missing":
+         status = 404
+      elif self.path == "/no-head" and self.command == "HEAD":
+         status = 405
+      else:
+         status = 200
+      self.send_response(status)
+      self.send_header("Content-Length", "2")
+      self.end_headers()
+      if body:
+         self.wfile.write(b"ok")
+
+   def do_HEAD(self):
+      self.respond(False)
+
+   def do_GET(self):
+      self.respond(True)
+
+   def log_message(self, format, *args):
+      pass
+
+class TestLinkChecker(unittest.TestCase):
+   def render(self, source, url, markdown):
+      context = RenderContext(check_links=True)
+      context.record_page(source, url, "Title", {})
+      markdown_to_html_node(markdown, context).to_html()
+      return context
+
+   def test_render_collects_links(self):
+      context = self.render("content/index.md", "/", "See [Tom](/blog/tom) and ![a tree](/images/tree.png)\n\n- [Rivendell](https://example.com/rivendell)")
+      self.assertEqual([
+         {"source": "content/index.md", "page": "/", "url": "/blog/tom", "kind": "link"},
+         {"source": "content/index.md", "page": "/", "url": "/images/tree.png", "kind": "image"},
+         {"source": "content/index.md", "page": "/", "url": "https://example.com/rivendell", "kind": "link"},
+      ], context.links)
+
+   def test_render_without_check_collects_nothing(self):
+      context = RenderContext()
+      markdown_to_html_node("[Tom](/blog/tom)", context).to_html()
+      self.assertEqual([], context.links)
+
+   def test_internal_links(self):
+      checker = LinkChecker(["/", "/blog/tom/", "/images/tree.png"])
+      context = self.render("content/blog/tom/index.md", "/blog/tom/", "\n\n".join([
+         "[home](/) [self](/blog/tom) [index](/blog/tom/index.html) [anchor](#top) [query](/?q=tom#x)",
+         "![tree](../../images/tree.png) [mail](mailto:tom@example.com)",
+         "[gone](/blog/glorfindel/) ![missing](/images/missing.png)",
+      ]))
+      failures = checker.check(context.links)
+      self.assertEqual(["/blog/glorfindel/", "/images/missing.png"], [failure["url"] for failure in failures])
+      self.assertEqual(["link", "image"], [failure["kind"] for failure in failures])
+
+   def test_relative_links_resolve_against_page(self):
+      checker = LinkChecker(["/blog/tom/", "/blog/glorfindel/"])
+      context = self.render("content/blog/tom/index.md", "/blog/tom/", "[sibling](../glorfindel/) [wrong](glorfindel/)")
+      self.assertEqual(["glorfindel/"], [failure["url"] for failure in checker.check(context.links)])
+
+   def test_generated_files_are_targets(self):
+      pages = [{"url": "/"}, {"url": "/blog/tom/"}]
+      outputs = {"index.html", "blog/tom/index.html", "blog/index.html", "feed.xml", "sitemap.xml", "highlight.css",
+                 "asset-manifest.json", "index.3f2a1c9d.css", "images/tom.444582ce.480w.webp"}
+      checker = LinkChecker(site_targets(pages, outputs))
+      context = self.render("content/contact/index.md", "/contact/", "\n\n".join([
+         "[RSS feed](/feed.xml) [sitemap](/sitemap.xml) [blog](/blog/) [css](/highlight.css)",
+         "![tom](/images/tom.444582ce.480w.webp) [manifest](/asset-manifest.json) [styles](/index.3f2a1c9d.css)",
+         "[gone](/atom.xml)",
+      ]))
+      self.assertEqual(["/atom.xml"], [failure["url"] for failure in checker.check(context.links)])
+
+   def test_percent_encoded_links(self):
+      checker = LinkChecker(["/", "/images/my pic.png", "/blog/café/"])
+      context = self.render("content/index.md", "/", "![x](/images/my%20pic.png) [c](/blog/caf%C3%A9/) ![y](/images/my%20other.png)")
+      self.assertEqual(["/images/my%20other.png"], [failure["url"] for failure in checker.check(context.links)])
+
+   def test_format_failure_line(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         source = os.path.join(tmp, "index.md")
+         with open(source, "w") as f:
+            f.write("# Title\n\nFine [home](/)\n\nBroken [gone](/gone/)\n")
+         failure = {"source": source, "url": "/gone/", "kind": "link", "reason": "no such page or asset"}
+         self.assertEqual(f"{source}:5: broken link /gone/ (no such page or asset)", format_failure(failure))
+
+   def test_external_links_use_stand_in_server(self):
+      server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+      server.lock = threading.Lock()
+      server.requests = []
+      server.connections = 0
+      thread = threading.Thread(target=server.serve_forever, daemon=True)
+      thread.start()
+      try:
+         checker = LinkChecker([], timeout=5, server=f"127.0.0.1:{server.server_address[1]}")
+         urls = [f"https://example.com/page/{number}" for number in range(20)]
+         urls += ["https://example.com/missing", "http://other.example/no-head", "https://example.com/page/0"]
+         links = [{"source": "content/index.md", "page": "/", "url": url, "kind": "link"} for url in urls]
+         failures = checker.check(links, external=True, workers=4)
+      finally:
+         server.shutdown()
+         server.server_close()
+
+      self.assertEqual([("https://example.com/missing", "HTTP 404")], [(failure["url"], failure["reason"]) for failure in failures])
+      # each distinct url is requested once, HEAD first, with the original host
+      heads = [request for request in server.requests if request[0] == "HEAD"]
+      self.assertEqual(22, len(heads))
+      self.assertIn(("GET", "other.example", "/no-head"), server.requests)
+      # keep-alive connections are reused: at most one per worker thread
+      self.assertLessEqual(server.connections, 4)
+      self.assertEqual(server.connections, checker.opened)
+
+   def test_external_links_skipped_by_default(self):
+      checker = LinkChecker([], server="127.0.0.1:1")
+      links = [{"source": "content/index.md", "page": "/", "url": "https://example.com/", "kind": "link"}]
+      self.assertEqual([], checker.check(links))
+
+   def test_unreachable_host_is_a_failure(self):
+      checker = LinkChecker([], timeout=1, server="127.0.0.1:1")
+      links = [{"source": "content/index.md", "page": "/", "url": "https://example.com/", "kind": "link"}]
+      failures = checker.check(links, external=True)
+      self.assertEqual(1, len(failures))
+
+if __name__ == "__main__":
+   unittest.main()
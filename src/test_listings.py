@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from frontmatter import split_front_matter
+from rendercontext import RenderContext
+from listings import sort_pages, write_feed, write_listing, write_sitemap
+
+def page(url, title, date=None, tags=None):
+   return {"source": url, "url": url, "title": title, "date": date, "tags": tags or []}
+
+class TestListings(unittest.TestCase):
+   def setUp(self):
+      self.pages = [
+         page("/", "Home"),
+         page("/blog/tom/", "Tom", "2024-01-01", ["hobbits"]),
+         page("/blog/glorfindel/", "Glorfindel", "2024-03-01"),
+         page("/blog/majesty/", "Majesty"),
+      ]
+
+   def test_sort_pages(self):
+      self.assertEqual(
+         ["/blog/glorfindel/", "/blog/tom/", "/", "/blog/majesty/"],
+         [p["url"] for p in sort_pages(self.pages)]
+      )
+
+   def test_sitemap_and_feed(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         self.assertTrue(write_sitemap(self.pages, tmp, "https://example.com/", "/base/"))
+         self.assertFalse(write_sitemap(self.pages, tmp, "https://example.com/", "/base/"))
+         with open(os.path.join(tmp, "sitemap.xml")) as f:
+            sitemap = f.read()
+         self.assertIn("<loc>https://example.com/base/blog/tom/</loc>", sitemap)
+         self.assertIn("<lastmod>2024-01-01</lastmod>", sitemap)
+
+         write_feed(self.pages, tmp, "https://example.com", "/", "Home")
+         with open(os.path.join(tmp, "feed.xml")) as f:
+            feed = f.read()
+         self.assertEqual(3, feed.count("<item>"))
+         self.assertIn("<pubDate>Mon, 01 Jan 2024 00:00:00 +0000</pubDate>", feed)
+         self.assertIn("<category>hobbits</category>", feed)
+         self.assertLess(feed.index("Glorfindel"), feed.index("Tom"))
+
+   def test_paginated_listing(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         template = os.path.join(tmp, "template.html")
+         with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+         result = write_listing(self.pages, "blog", template, tmp, "/base/", page_size=2)
+         self.assertEqual(["/blog/", "/blog/page/2/"], result["urls"])
+         self.assertEqual(2, result["written"])
+         with open(os.path.join(tmp, "blog", "index.html")) as f:
+            first = f.read()
+         self.assertIn('<a href="/base/blog/glorfindel/">Glorfindel</a>', first)
+         self.assertIn('<a href="/base/blog/page/2/" rel="next">Older</a>', first)
+
+         # an unchanged rebuild writes nothing, a shorter listing removes the extra page
+         self.assertEqual(0, write_listing(self.pages, "blog", template, tmp, "/base/", page_size=2)["written"])
+         write_listing(self.pages, "blog", template, tmp, "/base/", page_size=3)
+         self.assertFalse(os.path.exists(os.path.join(tmp, "blog", "page", "2")))
+
+   def test_typed_front_matter(self):
+      context = RenderContext()
+      for url, front_matter in (("/blog/tom/", "date: 2024\ntags: [1, 2]"), ("/blog/glorfindel/", "date: 2024-05-01\ntags: elves")):
+         metadata, body = split_front_matter(f"---\n{front_matter}\n---\n# {url}")
+         context.record_page(url, url, url, metadata)
+      with tempfile.TemporaryDirectory() as tmp:
+         template = os.path.join(tmp, "template.html")
+         with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+         write_feed(context.pages, tmp, "https://example.com", "/", "Home")
+         write_listing(context.pages, "blog", template, tmp, "/", context=context)
+         with open(os.path.join(tmp, "feed.xml")) as f:
+            feed = f.read()
+         with open(os.path.join(tmp, "blog", "index.html")) as f:
+            listing = f.read()
+      self.assertIn("<category>1</category>", feed)
+      self.assertEqual(1, feed.count("<pubDate>"))
+      self.assertIn("<small>1, 2</small>", listing)
+      self.assertLess(listing.index("/blog/glorfindel/"), listing.index("/blog/tom/"))
+
+if __name__ == "__main__":
+   unittest.main()
@@ -1,10 +1,15 @@
+import os
+import subprocess
+import sys
 import unittest
 from markdown_blocks import (
    markdown_to_blocks, 
    block_to_block_type, 
    BlockType,
    markdown_to_html_node,
-   extract_title
+   extract_title,
+   ordered_list_to_html_node,
+   unordered_list_to_html_node
 )
 
 class TestMarkdownToHTML(unittest.TestCase):
@@ -177,5 +182,37 @@ This is a paragraph
       with self.assertRaises(Exception) as context: 
          extract_title(md)
 
+class TestStreamingLists(unittest.TestCase):
+   def test_lazy_list_renders_more_than_once(self):
+      node = unordered_list_to_html_node("- one\n- **two**")
+      expected = "<ul><li>one</li><li><b>two</b></li></ul>"
+      self.assertEqual(expected, node.to_html())
+      self.assertEqual(expected, node.to_html())
+
+   def test_lazy_ordered_list(self):
+      node = ordered_list_to_html_node("1. one\n2. _two_")
+      self.assertEqual("<ol><li>one</li><li><i>two</i></li></ol>", node.to_html())
+
+   @unittest.skipUnless(sys.platform.startswith("linux"), "ru_maxrss is reported in KiB on linux only")
+   def test_million_item_list_memory_ceiling(self):
+      # run in a fresh interpreter so the peak RSS belongs to the render alone
+      script = (
+         "import resource\n"
+         "from markdown_blocks import markdown_to_html_node\n"
+         "md = '\\n'.join(f'- item {i}' for i in range(1_000_000))\n"
+         "html = markdown_to_html_node(md).to_html()\n"
+         "assert html.endswith('<li>item 999999</li></ul></div>')\n"
+         "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+      )
+      result = subprocess.run(
+         [sys.executable, "-c", script],
+         cwd=os.path.dirname(os.path.abspath(__file__)),
+         capture_output=True,
+         text=True,
+         check=True,
+      )
+      peak_mib = int(result.stdout.strip()) / 1024
+      self.assertLess(peak_mib, 160)
+
 if __name__ == "__main__":
    unittest.main()
\ No newline at end of file
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from markdown_blocks import markdown_to_html_node
+from rendercontext import RenderContext
+from search import SearchIndex, shard_name, tokenize
+
+class TestSearchIndex(unittest.TestCase):
+   def test_tokenize(self):
+      self.assertEqual(["tom", "bombadil", "was", "a", "mistake"], tokenize("Tom **Bombadil** was a _mistake_!"))
+
+   def test_tokenize_folds_accents(self):
+      self.assertEqual(["numenor", "vaya", "marie", "ea"], tokenize("Númenor Váya márië Eä"))
+      self.assertEqual(["strasse", "ελφ"], tokenize("Straße ἐλφ"))
+
+   def test_accented_search(self):
+      index = SearchIndex()
+      index.add_page("/blog/majesty/", "Majesty", [], ["the rise of Númenor"])
+      self.assertEqual(["/blog/majesty/"], index.search("núm"))
+      self.assertEqual(["/blog/majesty/"], index.search("NUM"))
+
+   def test_shard_names_are_safe(self):
+      self.assertEqual("nu", shard_name("nu"))
+      self.assertEqual("_ceb5cebb", shard_name("ελ"))
+      with tempfile.TemporaryDirectory() as tmp:
+         index = SearchIndex()
+         index.add_page("/a/", "Númenor", [], ["ἐλφ"])
+         index.write(tmp)
+         self.assertEqual(["_ceb5cebb.json", "nu.json"], sorted(os.listdir(os.path.join(tmp, "terms"))))
+         self.assertEqual(["/a/"], SearchIndex.load(tmp).search("ελ"))
+
+   def test_render_collects_text(self):
+      context = RenderContext(search_index=SearchIndex())
+      context.begin_page()
+      markdown_to_html_node("# Title\n\nSome **bold** text\n\n- item one\n- item two", context).to_html()
+      self.assertEqual(["Title"], context.headings)
+      self.assertEqual(["Title", "Some ", "bold", " text", "item one", "item two"], context.text)
+
+   def test_render_without_index_collects_nothing(self):
+      context = RenderContext()
+      markdown_to_html_node("# Title\n\nSome text", context).to_html()
+      self.assertEqual([], context.text)
+
+   def test_prefix_search_ranks_title_first(self):
+      index = SearchIndex()
+      index.add_page("/blog/tom/", "Tom Bombadil", [], ["a merry fellow"])
+      index.add_page("/blog/glorfindel/", "Glorfindel", ["Tom"], ["not tom at all"])
+      self.assertEqual(["/blog/tom/", "/blog/glorfindel/"], index.search("to"))
+      self.assertEqual(["/blog/glorfindel/"], index.search("glorf"))
+      self.assertEqual([], index.search("legolas"))
+
+   def test_page_url(self):
+      context = RenderContext(output_dir="docs")
+      self.assertEqual("/", context.page_url(os.path.join("docs", "index.html"), "/"))
+      self.assertEqual("/base/blog/tom/", context.page_url(os.path.join("docs", "blog", "tom", "index.html"), "/base/"))
+
+   def test_write_load_incremental(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         index = SearchIndex()
+         index.add_page("/a/", "Alpha", [], ["shared words"])
+         index.add_page("/b/", "Beta", [], ["shared words"])
+         index.write(tmp)
+         with open(os.path.join(tmp, "terms", "al.json")) as f:
+            self.assertEqual({"alpha": [[0, 10]]}, json.load(f))
+
+         # a rebuild that changes only page b leaves the shards of page a alone
+         index = SearchIndex.load(tmp)
+         self.assertEqual(["/a/"], index.search("alpha"))
+         index.add_page("/a/", "Alpha", [], ["shared words"])
+         index.add_page("/b/", "Gamma", [], ["shared words"])
+         index.prune_untouched()
+         self.assertEqual(2, index.write(tmp))
+         self.assertFalse(os.path.exists(os.path.join(tmp, "terms", "be.json")))
+
+         # pages that are not rendered again are dropped and their id is reused
+         index = SearchIndex.load(tmp)
+         index.add_page("/b/", "Gamma", [], ["shared words"])
+         index.prune_untouched()
+         index.add_page("/c/", "Delta", [], [])
+         self.assertEqual(0, index.ids["/c/"])
+         self.assertEqual([], index.search("alpha"))
+
+if __name__ == "__main__":
+   unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from buildcache import BuildCache
+from templates import TemplateSet
+from util import fill_template
+
+class TestTemplates(unittest.TestCase):
+   def setUp(self):
+      self.tmp = tempfile.TemporaryDirectory()
+      self.dir = self.tmp.name
+      self.write("base.html", "<title>{% block title %}{{ Title }}{% endblock %}</title>{% block content %}{{ Content }}{% endblock %}{% include \"footer.html\" %}")
+      self.write("footer.html", "<footer>{{ author }}</footer>")
+      self.write("blog.html", '{% extends "base.html" %}\n{% block content %}<nav>blog</nav>{{ Content }}{% endblock %}')
+      self.templates = TemplateSet((self.dir,))
+
+   def tearDown(self):
+      self.tmp.cleanup()
+
+   def write(self, name, text):
+      with open(os.path.join(self.dir, name), "w") as f:
+         f.write(text)
+
+   def test_render_base(self):
+      layout = self.templates.load("base.html")
+      self.assertEqual(
+         "<title>Hi</title><p>x</p><footer>me</footer>",
+         layout.render({"Title": "Hi", "Content": "<p>x</p>", "author": "me"})
+      )
+
+   def test_unknown_variables_are_kept(self):
+      layout = self.templates.load("footer.html")
+      self.assertEqual("<footer>{{ author }}</footer>", layout.render({}))
+
+   def test_fill_template_escapes_variables_for_attributes(self):
+      self.write("meta.html", '<title>{{ Title }}</title><meta name="description" content="{{ description }}" />{{ Content }}')
+      layout = self.templates.load("meta.html")
+      html = fill_template(layout, 'Tom & "Goldberry"', "<p>x</p>", "/", variables={"description": 'A "merry" <fellow>'})
+      self.assertEqual(
+         '<title>Tom &amp; &quot;Goldberry&quot;</title>'
+         '<meta name="description" content="A &quot;merry&quot; &lt;fellow&gt;" /><p>x</p>',
+         html
+      )
+
+   def test_extends_overrides_blocks(self):
+      layout = self.templates.load("blog.html")
+      self.assertEqual(
+         "<title>Hi</title><nav>blog</nav><p>x</p><footer>me</footer>",
+         layout.render({"Title": "Hi", "Content": "<p>x</p>", "author": "me"})
+      )
+      self.assertEqual(
+         [os.path.join(self.dir, name) for name in ("blog.html", "base.html", "footer.html")],
+         layout.dependencies
+      )
+
+   def test_layouts_are_compiled_once(self):
+      self.assertIs(self.templates.load("blog.html"), self.templates.load("blog.html"))
+
+   def test_select(self):
+      self.assertTrue(self.templates.select({}, "/blog/tom/", "base.html").name.endswith("blog.html"))
+      self.assertTrue(self.templates.select({}, "/contact/", "base.html").name.endswith("base.html"))
+      self.assertTrue(self.templates.select({"template": "blog"}, "/", "base.html").name.endswith("blog.html"))
+
+   def test_search_dirs_before_root(self):
+      layouts = os.path.join(self.dir, "layouts")
+      os.makedirs(layouts)
+      with open(os.path.join(layouts, "blog.html"), "w") as f:
+         f.write("layouts {{ Content }}")
+      self.write("contact.html", "root {{ Content }}")
+      cwd = os.getcwd()
+      os.chdir(self.dir)
+      try:
+         templates = TemplateSet()
+         # blog.html exists in layouts/ and in the project root; layouts/ wins
+         self.assertEqual("layouts x", templates.load("blog.html").render({"Content": "x"}))
+         self.assertEqual("layouts x", templates.select({}, "/blog/tom/", "base.html").render({"Content": "x"}))
+         # a root-level file named after a section is not picked up as its layout
+         self.assertTrue(templates.select({}, "/contact/", "base.html").name.endswith("base.html"))
+      finally:
+         os.chdir(cwd)
+
+   def test_digest_follows_dependencies(self):
+      blog = self.templates.load("blog.html").digest
+      self.write("footer.html", "<footer>changed</footer>")
+      self.assertNotEqual(blog, TemplateSet((self.dir,)).load("blog.html").digest)
+
+   def test_invalid_templates(self):
+      self.write("open.html", "{% block content %}")
+      with self.assertRaises(ValueError):
+         self.templates.load("open.html")
+      self.write("loop.html", '{% extends "loop.html" %}')
+      with self.assertRaises(ValueError):
+         self.templates.load("loop.html")
+      with self.assertRaises(ValueError):
+         self.templates.load("missing.html")
+
+   def test_site_template_renders_like_plain_replacement(self):
+      root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+      layout = TemplateSet((root,)).load("template.html")
+      html = layout.render({"Title": "T", "Content": "<p>C</p>"})
+      self.assertIn("<title>T</title>", html)
+      self.assertIn("<article><p>C</p></article>", html)
+      self.assertNotIn("{%", html)
+
+class TestBuildCache(unittest.TestCase):
+   def test_fresh_pages(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         dest = os.path.join(tmp, "index.html")
+         cache_path = os.path.join(tmp, "cache.json")
+         cache = BuildCache.load(cache_path, {"basepath": "/"})
+         self.assertFalse(cache.is_fresh(dest, "src", "layout"))
+         with open(dest, "w") as f:
+            f.write("html")
+         cache.update(dest, "src", "layout")
+         cache.save()
+
+         cache = BuildCache.load(cache_path, {"basepath": "/"})
+         self.assertTrue(cache.is_fresh(dest, "src", "layout"))
+         self.assertFalse(cache.is_fresh(dest, "src", "other layout"))
+         self.assertFalse(BuildCache.load(cache_path, {"basepath": "/other/"}).is_fresh(dest, "src", "layout"))
+
+if __name__ == "__main__":
+   unittest.main()
@@ -1,11 +1,20 @@
+import hashlib
+import os
+import tempfile
 import unittest
+from unittest import mock
+import util
 from util import (
    split_nodes_delimiter, 
    extract_markdown_links, 
    extract_markdown_images, 
    split_nodes_images, 
    split_nodes_links, 
-   text_to_textnode
+   text_to_textnode,
+   write_if_changed,
+   copy_files,
+   generate_page_recursive,
+   remove_stale_outputs
    )
 from textnode import TextNode, TextType
 
@@ -169,4 +178,116 @@ class TestRegex(unittest.TestCase):
          nodes,
       )
 
-   
\ No newline at end of file
+
+class TestWriteIfChanged(unittest.TestCase):
+   def test_write_new_file(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         path = os.path.join(tmp, "nested", "index.html")
+         self.assertTrue(write_if_changed(path, b"<p>hello</p>"))
+         with open(path, "rb") as f:
+            self.assertEqual(b"<p>hello</p>", f.read())
+
+   def test_unchanged_content_is_skipped(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         path = os.path.join(tmp, "index.html")
+         write_if_changed(path, b"<p>hello</p>")
+         os.utime(path, (0, 0))
+         self.assertFalse(write_if_changed(path, b"<p>hello</p>"))
+         self.assertEqual(0, os.path.getmtime(path))
+
+   def test_changed_content_is_replaced(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         path = os.path.join(tmp, "index.html")
+         write_if_changed(path, b"<p>hello</p>")
+         self.assertTrue(write_if_changed(path, b"<p>bye</p>"))
+         with open(path, "rb") as f:
+            self.assertEqual(b"<p>bye</p>", f.read())
+         self.assertEqual(["index.html"], os.listdir(tmp))
+
+   def test_copy_files_counts(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         src = os.path.join(tmp, "static")
+         os.makedirs(os.path.join(src, "images"))
+         for name in ("index.css", os.path.join("images", "a.png")):
+            with open(os.path.join(src, name), "wb") as f:
+               f.write(name.encode())
+         dst = os.path.join(tmp, "docs")
+         stats = copy_files(src, dst, workers=4)
+         self.assertEqual((2, 2, 0), (stats["files"], stats["written"], stats["unchanged"]))
+         self.assertEqual(["images/a.png", "index.css"], stats["paths"])
+         stats = copy_files(src, dst, workers=4)
+         self.assertEqual((2, 0, 2, 0), (stats["files"], stats["written"], stats["unchanged"], stats["bytes"]))
+         with open(os.path.join(dst, "images", "a.png"), "rb") as f:
+            self.assertEqual(os.path.join("images", "a.png").encode(), f.read())
+
+   def test_copy_skips_hashing_when_size_and_mtime_match(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         src = os.path.join(tmp, "a.png")
+         dst = os.path.join(tmp, "b.png")
+         with open(src, "wb") as f:
+            f.write(b"image")
+         self.assertEqual((True, None), util.copy_if_changed(src, dst))
+         self.assertEqual(os.stat(src).st_mtime_ns, os.stat(dst).st_mtime_ns)
+         with mock.patch("util.file_digest", wraps=util.file_digest) as digest:
+            self.assertEqual((False, None), util.copy_if_changed(src, dst))
+            self.assertEqual(0, digest.call_count)
+
+         # same content with another mtime is hashed once, then takes the fast path
+         os.utime(dst, ns=(0, 0))
+         with mock.patch("util.file_digest", wraps=util.file_digest) as digest:
+            self.assertFalse(util.copy_if_changed(src, dst)[0])
+            self.assertFalse(util.copy_if_changed(src, dst)[0])
+            self.assertEqual(2, digest.call_count)
+
+         # same size, different content and mtime is copied
+         with open(src, "wb") as f:
+            f.write(b"IMAGE")
+         os.utime(src, ns=(10**18, 10**18))
+         self.assertTrue(util.copy_if_changed(src, dst)[0])
+         with open(dst, "rb") as f:
+            self.assertEqual(b"IMAGE", f.read())
+
+   def test_copy_files_hashes(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         src = os.path.join(tmp, "static")
+         os.makedirs(src)
+         with open(os.path.join(src, "index.css"), "wb") as f:
+            f.write(b"body {}")
+         stats = copy_files(src, os.path.join(tmp, "docs"), hash_files=True)
+         self.assertEqual(
+            {"index.css": hashlib.sha256(b"body {}").hexdigest()},
+            stats["hashes"]
+         )
+
+   def test_deleted_sources_are_removed_from_output(self):
+      with tempfile.TemporaryDirectory() as tmp:
+         src = os.path.join(tmp, "static")
+         content = os.path.join(tmp, "content")
+         dst = os.path.join(tmp, "docs")
+         template = os.path.join(tmp, "template.html")
+         os.makedirs(os.path.join(src, "images"))
+         os.makedirs(os.path.join(content, "contact"))
+         with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+         for name, text in (("index.md", "# Home"), (os.path.join("contact", "index.md"), "# Contact")):
+            with open(os.path.join(content, name), "w") as f:
+               f.write(text)
+         for name in ("index.css", os.path.join("images", "a.png")):
+            with open(os.path.join(src, name), "wb") as f:
+               f.write(name.encode())
+
+         def build():
+            copied = copy_files(src, dst)
+            pages = generate_page_recursive(content, template, dst, "/")
+            outputs = set(copied["paths"])
+            outputs.update(os.path.relpath(path, dst).replace(os.sep, "/") for path in pages["paths"])
+            return remove_stale_outputs(dst, outputs)
+
+         self.assertEqual([], build())
+         os.remove(os.path.join(content, "contact", "index.md"))
+         os.rmdir(os.path.join(content, "contact"))
+         os.remove(os.path.join(src, "images", "a.png"))
+         self.assertEqual(["contact/index.html", "images/a.png"], build())
+         self.assertFalse(os.path.exists(os.path.join(dst, "contact")))
+         self.assertFalse(os.path.exists(os.path.join(dst, "images")))
+         self.assertEqual(["index.css", "index.html"], sorted(os.listdir(dst)))
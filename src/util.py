@@ -1,8 +1,12 @@
 import re
 import os
 import shutil
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from textnode import TextNode, TextType
-from htmlnode import LeafNode
+from htmlnode import LeafNode, escape_attribute
 
 #Create functions that are generally utility functions.
 #Function to split nodes based on a list of nodes, delimiter and text type
@@ -117,7 +121,8 @@ def text_to_textnode(text):
     return node
 
 
-def text_node_to_html_node(text_node):
+# context is an optional RenderContext; its images map adds srcset/width/height/loading to img tags
+def text_node_to_html_node(text_node, context=None):
    # use a match case statement to convert the TextNode based on what the Enum type is into a HTMLNode
    match text_node.text_type:
       case TextType.TEXT:
@@ -131,38 +136,195 @@ def text_node_to_html_node(text_node):
       case TextType.LINK:
          return LeafNode("a", text_node.text, {"href": text_node.url})
       case TextType.IMAGE:
-         return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+         props = {"src": text_node.url, "alt": text_node.text}
+         if context is not None and context.images and text_node.url in context.images:
+            props.update(context.images[text_node.url])
+         return LeafNode("img", "", props)
       case _:
          raise ValueError(f"invalid text type: {text_node.text_type}")
        
-#recursive function to copy files from a source directory to a destination directory.
-# -- input: src (Path), dest (Path)
-def copy_files(source, destination):
+#Function to replace dest_path atomically: write_func fills a temp file next to it, which is then renamed into place.
+#The destination directory must already exist.
+# -- input: dest_path (Path), write_func (function taking the temp path), mode_from (Path, optional file to copy permissions from)
+def atomic_write(dest_path, write_func, mode_from=None):
+    # write next to the destination so the rename stays on one filesystem and is atomic
+    dest_dir, dest_name = os.path.split(dest_path)
+    tmp_path = os.path.join(dest_dir, f".{dest_name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write_func(tmp_path)
+        if mode_from is not None:
+            shutil.copymode(mode_from, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-    if os.path.exists(destination):
-        print(f"The destination directory exists: {destination}")
-        print(f"Deleting the destination directory and contents: {destination}")
-        shutil.rmtree(destination)
+#Function to hash a file in chunks so large assets are never read into memory at once
+# -- input: path (Path)
+# -- output: hex sha256 digest (string)
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
+#Function to write bytes to a file atomically, skipping the write when the content is unchanged.
+# -- input: dest_path (Path), data (bytes)
+# -- output: True if the file was written, False if it already held the same content
+def write_if_changed(dest_path, data):
+    if os.path.isfile(dest_path) and os.path.getsize(dest_path) == len(data):
+        if file_digest(dest_path) == hashlib.sha256(data).hexdigest():
+            return False
 
-    print(f"Creating directory: {destination}")
-    os.mkdir(destination)
-    print("*" * 20)
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    atomic_write(dest_path, write)
+    return True
 
+#Function to copy a file atomically, skipping the copy when the destination already has the same content.
+#Copies take the source's mtime, so a destination with the same size and mtime is known to be
+#unchanged without reading either file; only a mismatch falls back to comparing hashes.
+# -- input: src_path (Path), dest_path (Path), hash_file (bool, always return the source digest)
+# -- output: tuple (written, digest) where digest is None unless it had to be computed
+def copy_if_changed(src_path, dest_path, hash_file=False):
+    digest = file_digest(src_path) if hash_file else None
+    src_stat = os.stat(src_path)
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        dest_stat = None
+    if dest_stat is not None and dest_stat.st_size == src_stat.st_size:
+        if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return False, digest
+        if digest is None:
+            digest = file_digest(src_path)
+        if file_digest(dest_path) == digest:
+            # same content, so take the source mtime and let the next build use the fast path
+            os.utime(dest_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+            return False, digest
 
-    for item in os.listdir(source):
-        src_item = os.path.join(source, item)
-        dst_item = os.path.join(destination, item)
-        if os.path.isfile(src_item):
-            print(f"We're looking at the file: {src_item}")
-            print(f"* Copying {src_item} -> {dst_item}")
-            shutil.copy(src_item, dst_item)
-        else:
-            print(f"This is a folder: {src_item}")
-            copy_files(src_item, dst_item)
+    def copy(tmp_path):
+        shutil.copyfile(src_path, tmp_path)
+        os.utime(tmp_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    atomic_write(dest_path, copy, mode_from=src_path)
+    return True, digest
+
+#Function to enumerate every file under a directory in a single walk.
+# -- input: directory (Path)
+# -- output: sorted list of paths relative to directory, using "/" separators
+def list_files(directory):
+    files = []
+    for root, dirs, names in os.walk(directory):
+        for name in names:
+            rel_path = os.path.relpath(os.path.join(root, name), directory)
+            files.append(rel_path.replace(os.sep, "/"))
+    files.sort()
+    return files
+
+#Function to copy a directory tree on a thread pool. The tree is enumerated once, then every file is
+#copied (and optionally hashed) concurrently. Files that already exist with the same content are left
+#untouched so their mtimes survive.
+# -- input: source (Path), destination (Path), workers (int, pool width, None for the executor default),
+#           hash_files (bool, record a sha256 digest of every file)
+# -- output: stats dict with "files", "written", "unchanged", "bytes" (bytes written), "seconds",
+#            "paths" (relative paths of every file) and "hashes" (relative path -> digest, if hash_files)
+def copy_files(source, destination, workers=None, hash_files=False):
+    start = time.perf_counter()
+    files = list_files(source)
+    stats = {"files": len(files), "written": 0, "unchanged": 0, "bytes": 0, "seconds": 0.0, "paths": files, "hashes": {}}
+
+    if not os.path.exists(destination):
+        print(f"Creating directory: {destination}")
+    # create every directory up front so the workers only ever touch files
+    for folder in sorted({os.path.dirname(rel_path) for rel_path in files} | {""}):
+        os.makedirs(os.path.join(destination, folder), exist_ok=True)
+
+    def copy_one(rel_path):
+        src_path = os.path.join(source, rel_path)
+        dst_path = os.path.join(destination, rel_path)
+        written, digest = copy_if_changed(src_path, dst_path, hash_files)
+        size = os.path.getsize(src_path) if written else 0
+        return rel_path, written, size, digest
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rel_path, written, size, digest in pool.map(copy_one, files):
+            if written:
+                stats["written"] += 1
+                stats["bytes"] += size
+            else:
+                stats["unchanged"] += 1
+            if hash_files:
+                stats["hashes"][rel_path] = digest
+
+    stats["seconds"] = time.perf_counter() - start
+    rate = stats["bytes"] / stats["seconds"] / (1024 * 1024) if stats["seconds"] > 0 else 0.0
+    print(f"Copied {stats['written']} of {stats['files']} files from {source} ({stats['bytes']} bytes) in {stats['seconds']:.3f}s, {rate:.1f} MiB/s")
+    return stats
 
+#Function to delete everything in the output directory that this build did not produce, e.g. pages whose
+#markdown was deleted or static files that were removed. This replaces wiping the directory up front,
+#which would defeat the unchanged-file checks.
+# -- input: destination (Path), outputs (set of paths relative to destination, using "/" separators)
+# -- output: sorted list of the relative paths that were removed
+def remove_stale_outputs(destination, outputs):
+    removed = [rel_path for rel_path in list_files(destination) if rel_path not in outputs]
+    for rel_path in removed:
+        os.remove(os.path.join(destination, rel_path))
+    # drop directories left empty, deepest first
+    for root, dirs, names in os.walk(destination, topdown=False):
+        if root != destination and not os.listdir(root):
+            os.rmdir(root)
+    if removed:
+        print(f"Removed {len(removed)} stale files from {destination}")
+    return removed
 
-def generate_page(from_path, template_path, dest_path, basepath):
+#Function to render a layout with a title and html content, then rewrite urls for the site.
+# -- input: layout (compiled Layout from templates.py), title (string), content (html string), basepath (string),
+#           assets (optional manifest of "/url" -> "/fingerprinted/url" used to rewrite href/src attributes),
+#           context (optional RenderContext; srcset urls are prefixed when it carries images),
+#           variables (optional dict of extra {{ name }} values, e.g. the page's front matter)
+#The title and variables are escaped for attribute values, which is also safe between tags; content is
+#already html. {{ Stylesheets }} becomes a link tag for
+#each of the context's stylesheets, or nothing.
+# -- output: html (string)
+def fill_template(layout, title, content, basepath, assets=None, context=None, variables=None):
+    values = {key: escape_attribute(str(value)) for key, value in (variables or {}).items() if value is not None}
+    stylesheets = "".join(
+        f'\n    <link href="{escape_attribute(url)}" rel="stylesheet" />' for url in (context.stylesheets if context is not None else [])
+    )
+    template = layout.render({**values, "Title": escape_attribute(title), "Content": content, "Stylesheets": stylesheets})
+    if assets:
+        from assets import rewrite_asset_urls
+        template = rewrite_asset_urls(template, assets)
+    template = template.replace('href="/', 'href="' + basepath).replace('src="/', 'src="' + basepath)
+    if context is not None and context.images:
+        from images import prefix_srcset
+        template = prefix_srcset(template, basepath)
+    return template
+
+#Function to get the compiled layout for template_path, from the build's TemplateSet when there is one
+# -- input: template_path (Path), context (optional RenderContext)
+# -- output: Layout
+def load_layout(template_path, context=None):
+    from templates import TemplateSet
+    if context is not None and context.templates is not None:
+        return context.templates.load(template_path)
+    return TemplateSet().load(template_path)
+
+#Function to render a markdown file into its layout and write it to dest_path.
+# -- input: template_path (Path, the default layout; front matter or a per-directory layout can override it),
+#           assets (optional manifest of "/url" -> "/fingerprinted/url" used to rewrite href/src attributes),
+#           context (optional RenderContext passed through to markdown rendering; the page's metadata is
+#           recorded on it, the page is added to its search index, and its build cache lets an
+#           up-to-date page skip rendering)
+# -- output: True if dest_path was written, False if it already held the same html
+def generate_page(from_path, template_path, dest_path, basepath, assets=None, context=None):
     print(f"Generating page from {from_path} to {dest_path} using template {template_path}.")
 
     if not os.path.exists(from_path):
@@ -173,36 +335,56 @@ def generate_page(from_path, template_path, dest_path, basepath):
         print(f"Read content from {from_path}")
         #print(content)
 
-    with open(template_path, "r") as f:
-        template = f.read()
-        print(f"Read template from {template_path}")
-
     # import the markdown_to_html_node function from markdown_blocks.py
     from markdown_blocks import markdown_to_html_node, extract_title
-    
+    from frontmatter import split_front_matter
+    from templates import TemplateSet
+
+    source_digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    metadata, content = split_front_matter(content)
     title = extract_title(content)
 
-    content = markdown_to_html_node(content).to_html()
+    templates = context.templates if context is not None and context.templates is not None else TemplateSet()
+    url = context.page_url(dest_path, "/") if context is not None else ""
+    layout = templates.select(metadata, url, template_path)
+    print(f"Using layout {layout.name}")
+
+    if context is not None:
+        context.record_page(from_path, url, title, metadata)
+        if (context.cache is not None
+                and (context.search_index is None or context.search_index.keep_page(context.page_url(dest_path, basepath)))
+                and context.cache.is_fresh(dest_path, source_digest, layout.digest)):
+            print(f"Up to date, skipped rendering {dest_path}")
+            return False
+        context.begin_page()
+
+    content = markdown_to_html_node(content, context).to_html()
+    if context is not None and context.search_index is not None:
+        context.search_index.add_page(context.page_url(dest_path, basepath), title, context.headings, context.text)
     print(f"Converted markdown to html")
     #print(content)
 
     #print(f"Extracted title: {title}")
 
-    template = template.replace("{{ Title }}", title).replace("{{ Content }}", content).replace('href="/', 'href="' + basepath).replace('src="/', 'src="' + basepath)
+    template = fill_template(layout, title, content, basepath, assets, context, metadata)
     print(f"Replaced title and content in template")
     print(template)
 
-    if not os.path.exists(dest_path):
-        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-        print(f"Created destination directory: {dest_path}")
-
-    with open(dest_path, "w") as f:
-        f.write(template)
+    written = write_if_changed(dest_path, template.encode("utf-8"))
+    if context is not None and context.cache is not None:
+        context.cache.update(dest_path, source_digest, layout.digest)
+    if written:
         print(f"Generated page in {dest_path}")
-        f.close()
+        return True
+    print(f"Unchanged page, skipped writing {dest_path}")
+    return False
 
 
-def generate_page_recursive(from_path, template_path, dest_path, basepath):
+#Function to render every markdown file under from_path into dest_path, keeping the directory layout
+# -- output: stats dict with "written", "unchanged" and "paths" (the dest path of every page)
+def generate_page_recursive(from_path, template_path, dest_path, basepath, stats=None, assets=None, context=None):
+    if stats is None:
+        stats = {"written": 0, "unchanged": 0, "paths": []}
     for file in os.listdir(from_path):
         file_path = os.path.join(from_path, file)
         dest_base_path = os.path.join(dest_path, file)
@@ -216,6 +398,11 @@ def generate_page_recursive(from_path, template_path, dest_path, basepath):
 
         if os.path.isfile(file_path) and ext == ".md":
             print(f"Generating page from {file_path} -> {new_dest_path} using template {template}.")
-            generate_page(file_path, template, new_dest_path, basepath)
+            if generate_page(file_path, template, new_dest_path, basepath, assets, context):
+                stats["written"] += 1
+            else:
+                stats["unchanged"] += 1
+            stats["paths"].append(new_dest_path)
         else:
-            generate_page_recursive(file_path, template, dest_base_path, basepath)
\ No newline at end of file
+            generate_page_recursive(file_path, template, dest_base_path, basepath, stats, assets, context)
+    return stats